@@ -0,0 +1,85 @@
+"""
+Disk-backed TTL cache for Moltbot CLI scripts
+Every CLI call is a new process, so results are kept in a JSON file
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_FILE = Path.home() / '.cache' / 'moltbot' / 'api.json'
+
+# Serializes read-modify-write of cache files between threads
+_lock = threading.Lock()
+
+def _load(path: Path) -> dict:
+    """Load the cache file, treating a missing or corrupt file as empty"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save(path: Path, store: dict):
+    """Write the cache file atomically (mode 0600), dropping expired entries"""
+    now = time.time()
+    store = {k: v for k, v in store.items() if v['expires'] > now}
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    # Cached results can name the user's accounts, so keep the file private
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(store, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+def ttl_cache(ttl_seconds: float, path: Path = DEFAULT_CACHE_FILE):
+    """Cache a function's JSON-serializable result on disk for ttl_seconds
+
+    Dict results with a truthy 'error' key are not cached, so a failed
+    call is retried next time. The wrapper gains cache_clear() to drop
+    this function's entries after a state change.
+    """
+    def decorator(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            raw = json.dumps([name, args, kwargs], sort_keys=True, default=str)
+            key = hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+            store = _load(path)
+            now = time.time()
+
+            hit = store.get(key)
+            if hit and hit['expires'] > now:
+                return hit['value']
+
+            value = func(*args, **kwargs)
+            if not (isinstance(value, dict) and value.get('error')):
+                with _lock:
+                    # Reload so entries saved by other threads meanwhile are kept
+                    store = _load(path)
+                    store[key] = {'func': name, 'expires': now + ttl_seconds, 'value': value}
+                    try:
+                        _save(path, store)
+                    except OSError:
+                        pass
+            return value
+
+        def cache_clear():
+            with _lock:
+                store = _load(path)
+                kept = {k: v for k, v in store.items() if v.get('func') != name}
+                if len(kept) != len(store):
+                    try:
+                        _save(path, kept)
+                    except OSError:
+                        pass
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
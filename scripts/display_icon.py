@@ -4,87 +4,281 @@ Display icon on Waveshare 1.44" LCD HAT (ST7735S)
 For Raspberry Pi Zero 2W
 """
 
-import st7735
-from PIL import Image
-import sys
+import numpy as np
+import PIL
+from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
 import os
+import sys
+from pathlib import Path
+
+# Pre-rendered RGB565 frame for the default splash screen
+SPLASH_CACHE = Path.home() / '.cache' / 'moltbot' / 'splash.rgb565'
+
+# Pillow-SIMD versions carry a '.postN' suffix; its NEON resize makes Lanczos cheap
+PILLOW_SIMD = '.post' in PIL.__version__
+_DOWNSCALE_FILTER = Image.LANCZOS if PILLOW_SIMD else Image.BILINEAR
+
+# Display is created on first use so Pillow-only paths skip SPI/GPIO setup
+_DISP = None
+
+def _get_disp():
+    """Get the display instance, initializing it on first call"""
+    global _DISP
+    if _DISP is None:
+        import st7735
+
+        # Waveshare 1.44" LCD HAT pins
+        # RST = 27, DC = 25, BL = 24, CS = 8 (SPI CE0)
+        _DISP = st7735.ST7735(
+            port=0,
+            cs=0,  # CE0
+            dc=25,
+            backlight=24,
+            rst=27,
+            width=128,
+            height=128,
+            rotation=0,
+            invert=False,
+            spi_speed_hz=24000000,  # ST7735S is stable at 24 MHz with short wiring
+            offset_left=2,
+            offset_top=1
+        )
+        _DISP.begin()
+    return _DISP
+
+def _render_text_rgb565(bg, fg, mask, out):
+    """Blend fg over bg by glyph coverage, writing RGB565 straight into out
+
+    Same arithmetic as the NumPy path in show_text; only run compiled.
+    """
+    for y in range(mask.shape[0]):
+        for x in range(mask.shape[1]):
+            m = np.int32(mask[y, x])
+            m += m >> 7  # map 0..255 coverage to 0..256 so >> 8 is exact at 255
+            r = bg[0] + (((fg[0] - bg[0]) * m) >> 8)
+            g = bg[1] + (((fg[1] - bg[1]) * m) >> 8)
+            b = bg[2] + (((fg[2] - bg[2]) * m) >> 8)
+            out[y, x] = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+# The numba kernel is opt-in (MOLTBOT_NUMBA=1): importing numba and loading
+# its cache costs far more on a cold start than one 128x128 NumPy blend
+_TEXT_KERNEL = None
+_TEXT_565 = None
+
+def _text_kernel():
+    """Get the compiled text kernel, or None to blend with NumPy"""
+    global _TEXT_KERNEL, _TEXT_565
+    if _TEXT_KERNEL is None:
+        _TEXT_KERNEL = False
+        if os.environ.get('MOLTBOT_NUMBA') == '1':
+            try:
+                from numba import njit
+            except ImportError:
+                return None
+            _TEXT_KERNEL = njit(cache=True)(_render_text_rgb565)
+            _TEXT_565 = np.zeros((128, 128), dtype=np.uint16)
+    return _TEXT_KERNEL or None
+
+# Load font once; parsing the TTF from SD card on every call is slow
+try:
+    _FONT = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', 16)
+except OSError:
+    _FONT = ImageFont.load_default()
+
+# Single framebuffer reused by every render instead of allocating per frame
+_CANVAS = Image.new('RGB', (128, 128))
+_DRAW = ImageDraw.Draw(_CANVAS)
+
+# Prebuilt all-black frame for the clear fast path
+_BLACK_IMG = Image.frombytes('RGB', (128, 128), b'\x00' * 128 * 128 * 3)
+
+# Grayscale glyph mask reused by show_text
+_MASK = Image.new('L', (128, 128))
+_MASK_DRAW = ImageDraw.Draw(_MASK)
+
+def _as_rgb565(img):
+    """Get a frame as a native-endian HxW uint16 RGB565 array (always a copy)"""
+    a = np.asarray(img)
+    if a.dtype == np.uint16:
+        # Already packed (e.g. from the text kernel)
+        return a.copy()
+    a = a.astype(np.uint8, copy=False)
+    return ((a[..., 0].astype(np.uint16) & 0xF8) << 8) \
+        | ((a[..., 1].astype(np.uint16) & 0xFC) << 3) \
+        | (a[..., 2] >> 3)
+
+def to_rgb565(img):
+    """Pack an RGB image into big-endian RGB565 bytes for the panel"""
+    return _as_rgb565(img).astype('>u2').tobytes()
+
+# Last frame pushed to the panel, used to send only the changed region
+_PREV = None
+
+def _blit(img):
+    """Push the changed region of a frame, skipping st7735's per-pixel conversion
+
+    Accepts an RGB image, an HxWx3 uint8 array or a packed HxW uint16 array.
+    """
+    global _PREV
+    frame = _as_rgb565(img)
+
+    if _PREV is None:
+        # Panel contents are unknown on the first push, send everything
+        y0, x0, y1, x1 = 0, 0, 128, 128
+    else:
+        ys, xs = np.nonzero(frame != _PREV)
+        if not ys.size:
+            return
+        y0, x0, y1, x1 = int(ys.min()), int(xs.min()), int(ys.max()) + 1, int(xs.max()) + 1
+
+    _PREV = frame
+    _get_disp().set_window(x0, y0, x1 - 1, y1 - 1)
+    _write_pixels(frame[y0:y1, x0:x1].astype('>u2').tobytes())
 
-# Waveshare 1.44" LCD HAT pins
-# RST = 27, DC = 25, BL = 24, CS = 8 (SPI CE0)
-
-# Create display instance
-disp = st7735.ST7735(
-    port=0,
-    cs=0,  # CE0
-    dc=25,
-    backlight=24,
-    rst=27,
-    width=128,
-    height=128,
-    rotation=0,
-    invert=False,
-    spi_speed_hz=4000000,
-    offset_left=2,
-    offset_top=1
-)
-
-# Initialize display
-disp.begin()
+def _write_pixels(buf):
+    """Stream pixel bytes to the panel in a single spidev call"""
+    # Sending the first byte through the driver leaves DC high (data mode);
+    # writebytes2 then takes the bytes buffer as-is and chunks it in C
+    disp = _get_disp()
+    disp.data(buf[:1])
+    disp._spi.writebytes2(buf[1:])
 
 def clear_display():
     """Clear display with black"""
-    img = Image.new('RGB', (128, 128), (0, 0, 0))
-    disp.display(img)
+    _blit(_BLACK_IMG)
 
 def show_image(image_path):
-    """Display an image on the LCD"""
+    """Display an image on the LCD
 
-    if not os.path.exists(image_path):
-        print(f'Error: {image_path} not found')
-        sys.exit(1)
+    Raises FileNotFoundError or UnidentifiedImageError if the file
+    cannot be opened as an image.
+    """
+    # Load first so a bad path leaves the screen untouched
+    img = Image.open(image_path)
 
     # Clear first
     clear_display()
 
-    # Load and resize image to fill entire display
-    img = Image.open(image_path)
-    img = img.resize((128, 128), Image.LANCZOS)
+    # Resize image to fill entire display
+
+    # Let the JPEG decoder downscale via DCT (no-op for other formats)
+    try:
+        img.draft('RGB', (128, 128))
+    except Exception:
+        pass
 
-    # Convert to RGB if needed
+    # Convert to RGB before resizing so the filter runs over 3 bands only.
+    # The mode check stays: convert() returns a full copy even for RGB input
     if img.mode != 'RGB':
         img = img.convert('RGB')
 
+    if img.width <= 128 and img.height <= 128:
+        # Icons/pixel art: plain index copy keeps edges sharp
+        img = img.resize((128, 128), Image.NEAREST)
+    else:
+        # reducing_gap does a cheap integer reduce per axis first, so very
+        # wide or tall sources keep their resolution on both axes
+        img = img.resize((128, 128), _DOWNSCALE_FILTER, reducing_gap=2.0)
+
     # Display
-    disp.display(img)
+    _CANVAS.paste(img)
+    _blit(_CANVAS)
     print(f'Displaying: {image_path}')
 
+def show_icon(image_path, x=0, y=0):
+    """Blit a small image at its native size with its top-left corner at (x, y)"""
+    img = Image.open(image_path).convert('RGB')
+    w, h = img.size
+    if x < 0 or y < 0 or x + w > 128 or y + h > 128:
+        raise ValueError(f'{image_path} ({w}x{h}) does not fit at ({x}, {y})')
+
+    # Only the icon's own rectangle goes over SPI
+    icon = _as_rgb565(img)
+    _get_disp().set_window(x, y, x + w - 1, y + h - 1)
+    _write_pixels(icon.astype('>u2').tobytes())
+    if _PREV is not None:
+        _PREV[y:y + h, x:x + w] = icon
+    print(f'Displaying icon: {image_path}')
+
+# Centered (x, y) origin per string, so repeated status text skips metrics
+_LAYOUT_CACHE = {}
+
+def _text_origin(text):
+    """Get the top-left position that centers text on the display"""
+    pos = _LAYOUT_CACHE.get(text)
+    if pos is None:
+        if hasattr(_FONT, 'size'):
+            w = int(_FONT.getlength(text))
+            h = _FONT.size
+        else:
+            # Bitmap fallback font has no size, measure the glyph box instead
+            bbox = _DRAW.textbbox((0, 0), text, font=_FONT)
+            w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        pos = _LAYOUT_CACHE[text] = ((128 - w) // 2, (128 - h) // 2)
+    return pos
+
 def show_text(text, bg_color=(0, 0, 0), text_color=(255, 255, 255)):
     """Display text on screen"""
-    from PIL import ImageDraw, ImageFont
-    
-    img = Image.new('RGB', (128, 128), bg_color)
-    draw = ImageDraw.Draw(img)
-    
-    # Use default font
-    try:
-        font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', 16)
-    except:
-        font = ImageFont.load_default()
-    
     # Center text
-    bbox = draw.textbbox((0, 0), text, font=font)
-    x = (128 - (bbox[2] - bbox[0])) // 2
-    y = (128 - (bbox[3] - bbox[1])) // 2
-    
-    draw.text((x, y), text, font=font, fill=text_color)
-    disp.display(img)
+    x, y = _text_origin(text)
+
+    # Rasterize glyphs into a single-band coverage mask, then blend the two
+    # solid colors in one vectorized pass instead of drawing on RGB
+    _MASK_DRAW.rectangle((0, 0, 128, 128), fill=0)
+    _MASK_DRAW.text((x, y), text, font=_FONT, fill=255)
+    bg = np.array(bg_color, dtype=np.int32)
+    fg = np.array(text_color, dtype=np.int32)
+    kernel = _text_kernel()
+    if kernel is not None:
+        frame = _TEXT_565
+        kernel(bg, fg, np.asarray(_MASK), frame)
+    else:
+        m = np.asarray(_MASK, dtype=np.int32)[..., None]
+        m += m >> 7  # same 0..256 coverage scale as the numba kernel
+        frame = (bg + (((fg - bg) * m) >> 8)).astype(np.uint8)
+
+    _blit(frame)
     print(f'Displaying text: {text}')
+    return frame
+
+def show_splash():
+    """Display the default MOLTBOT screen, reusing the cached frame if present"""
+    global _PREV
+    try:
+        buf = SPLASH_CACHE.read_bytes()
+    except OSError:
+        buf = b''
+
+    if len(buf) == 128 * 128 * 2:
+        # Deterministic render: push the stored bytes, skip font and blending
+        _get_disp().set_window()
+        _write_pixels(buf)
+        _PREV = None
+        print('Displaying text: MOLTBOT')
+        return
+
+    frame = show_text('MOLTBOT', bg_color=(30, 30, 60), text_color=(100, 200, 255))
+    try:
+        SPLASH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        SPLASH_CACHE.write_bytes(to_rgb565(frame))
+    except OSError:
+        pass
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         # Default: show Moltbot text
-        show_text('MOLTBOT', bg_color=(30, 30, 60), text_color=(100, 200, 255))
+        show_splash()
     elif sys.argv[1].endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-        show_image(sys.argv[1])
+        if not PILLOW_SIMD:
+            print('Note: vanilla Pillow in use; install pillow-simd for faster resize',
+                  file=sys.stderr)
+        try:
+            show_image(sys.argv[1])
+        except FileNotFoundError:
+            print(f'Error: {sys.argv[1]} not found')
+            sys.exit(1)
+        except UnidentifiedImageError:
+            print(f'Error: {sys.argv[1]} is not a valid image')
+            sys.exit(1)
     else:
         show_text(sys.argv[1])
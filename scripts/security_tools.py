@@ -4,23 +4,45 @@ Moltbot Security Tools - Defensive Security for Raspberry Pi
 Ethical hacking tools for network monitoring and protection
 """
 
+import atexit
 import subprocess
 import json
 import os
+import re
 import sys
 import socket
+import errno
+import select
+import selectors
+import shlex
+import shutil
+import signal
 import struct
 import time
 import hashlib
 import hmac
 import base64
-import asyncio
-import urllib.request
-import urllib.error
+import functools
+import threading
+from collections import defaultdict, deque, namedtuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 
+from _cache import ttl_cache
+
+# Each CLI call runs one command, so heavier modules (asyncio, http.client,
+# concurrent.futures, cryptography) are imported inside the code that uses them
+
+@functools.lru_cache(maxsize=None)
+def _aesgcm():
+    """AES-GCM class for the TOTP vault, or None if cryptography is missing"""
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        return AESGCM
+    except ImportError:
+        return None
+
 # ==================== CONFIGURATION ====================
 
 CONFIG_DIR = Path.home() / '.moltbot-security'
@@ -29,6 +51,22 @@ KNOWN_DEVICES_FILE = CONFIG_DIR / 'known_devices.json'
 HONEYPOT_LOG_FILE = CONFIG_DIR / 'honeypot.log'
 TOTP_VAULT_FILE = CONFIG_DIR / 'totp_vault.enc'
 BREACH_MONITOR_FILE = CONFIG_DIR / 'breach_monitor.json'
+HOSTNAME_CACHE_FILE = CONFIG_DIR / 'hostnames.json'
+HONEYPOT_PID_FILE = CONFIG_DIR / 'honeypot.pid'
+HONEYPOT_SERVICES_FILE = CONFIG_DIR / 'honeypot_services.json'
+HONEYPOT_LISTENING_FILE = CONFIG_DIR / 'honeypot_listening.json'
+VPN_PEERS_FILE = CONFIG_DIR / 'vpn_peers.json'
+LAST_SCAN_FILE = CONFIG_DIR / 'last_scan.json'
+# One private file per SHA1 prefix, so a lookup touches only its own bucket
+HIBP_CACHE_DIR = Path.home() / '.cache' / 'moltbot' / 'hibp'
+HIBP_CACHE_TTL = 86400
+
+# Seconds a resolved device hostname stays valid
+HOSTNAME_CACHE_TTL = 3600
+
+# 'alerts' only diffs the kernel ARP table against the last scan; a full
+# sweep is redone once the last one is older than this many seconds
+FULL_SCAN_INTERVAL = 600
 
 # Ensure config directory exists
 CONFIG_DIR.mkdir(exist_ok=True)
@@ -45,10 +83,39 @@ def load_json(filepath: Path, default: Any = None) -> Any:
         pass
     return default if default is not None else {}
 
+# Parsed JSON files by path, with the (mtime_ns, size) they were read at
+_json_cache: Dict[Path, tuple] = {}
+
+def _file_stamp(filepath: Path) -> Optional[tuple]:
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        st = filepath.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def load_json_cached(filepath: Path, default: Any = None) -> Any:
+    """load_json, reusing the parsed data until the file changes on disk
+
+    The result is shared between calls; callers that modify it must
+    write it back with save_json.
+    """
+    stamp = _file_stamp(filepath)
+    hit = _json_cache.get(filepath)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    data = load_json(filepath, default)
+    _json_cache[filepath] = (stamp, data)
+    return data
+
 def save_json(filepath: Path, data: Any):
     """Save data to JSON file"""
+    # Drop any cached copy; an edit within one mtime tick must not be missed
+    _json_cache.pop(filepath, None)
+    # Compact output; callers store timestamps as ISO strings already,
+    # so no default= fallback is needed
     with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+        json.dump(data, f, separators=(',', ':'))
 
 def run_cmd(cmd: str, timeout: int = 30) -> str:
     """Run shell command and return output"""
@@ -63,75 +130,284 @@ def run_cmd(cmd: str, timeout: int = 30) -> str:
     except Exception as e:
         return f"ERROR: {e}"
 
+# Keep-alive connections keyed by (scheme, host). http.client connections
+# are not thread-safe and check_passwords fans out over threads, so each
+# thread keeps its own set.
+_http_local = threading.local()
+
+def http_get(url: str, headers: Optional[Dict] = None, timeout: float = 10) -> bytes:
+    """GET a URL over a reused keep-alive connection and return the body"""
+    import http.client
+    import urllib.error
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    conns = getattr(_http_local, 'conns', None)
+    if conns is None:
+        conns = _http_local.conns = {}
+    key = (parts.scheme, parts.netloc)
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+    for attempt in range(2):
+        conn = conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            conn = conns[key] = cls(parts.netloc, timeout=timeout)
+        try:
+            conn.request('GET', path, headers=headers or {})
+            response = conn.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, ConnectionError):
+            # Server dropped the idle connection; reconnect once
+            conn.close()
+            del conns[key]
+            if attempt:
+                raise
+            continue
+        except Exception:
+            conn.close()
+            del conns[key]
+            raise
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        return body
+
+# Local IP rarely changes; reuse it for a minute instead of probing every call
+LOCAL_IP_TTL = 60
+_local_ip_cache: Optional[str] = None
+_local_ip_ts = 0.0
+
 def get_local_ip() -> str:
     """Get local IP address"""
+    global _local_ip_cache, _local_ip_ts
+    now = time.monotonic()
+    if _local_ip_cache and now - _local_ip_ts < LOCAL_IP_TTL:
+        return _local_ip_cache
+
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         ip = s.getsockname()[0]
         s.close()
-        return ip
     except:
+        # Don't cache the fallback, the network may just not be up yet
         return "127.0.0.1"
 
+    _local_ip_cache, _local_ip_ts = ip, now
+    return ip
+
 def get_network_prefix() -> str:
     """Get network prefix (e.g., 192.168.2)"""
     ip = get_local_ip()
     return '.'.join(ip.split('.')[:3])
 
+# /proc/net/arp lists hosts that never answered the sweep with an all-zero MAC
+INCOMPLETE_MAC = '00:00:00:00:00:00'
+
+# IP followed by a MAC on the same line of ARP/arp-scan output
+ARP_LINE_RE = re.compile(
+    r'(?P<ip>\d{1,3}(?:\.\d{1,3}){3})[^\n]*?(?P<mac>(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2})'
+)
+
+# Memoized per process: arp-scan repeats an IP on DUP replies, and
+# hostnames.json already carries results across runs
+@functools.lru_cache(maxsize=4096)
+def reverse_lookup(ip: str) -> str:
+    """Get hostname for IP via PTR lookup, or 'unknown'"""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except:
+        return "unknown"
+
+def icmp_checksum(data: bytes) -> int:
+    """Internet checksum (RFC 1071) for an ICMP packet"""
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
 # ==================== 1. NETWORK MONITOR ====================
 
+COMMON_PORTS = (21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 993, 995,
+                3306, 3389, 5432, 5900, 8080, 8443)
+
+def parse_ports(spec: str):
+    """Port list from 'common', 'full', or a list like '22,80,8000-8100'"""
+    if spec == "common":
+        return COMMON_PORTS
+    if spec == "full":
+        return range(1, 1025)
+    ports = []
+    for part in spec.split(','):
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            ports.extend(range(int(lo), int(hi) + 1))
+        else:
+            ports.append(int(part))
+    return ports
+
+# One scanned host; tuples instead of per-device dicts
+Device = namedtuple('Device', 'ip mac hostname seen')
+
+# Trusted and blocked MACs, rebuilt whenever known_devices.json is reloaded
+_known_macs: frozenset = frozenset()
+_known_macs_source: Optional[Dict] = None
+
 class NetworkMonitor:
     """Monitor network for devices and security threats"""
 
     @staticmethod
-    def scan_network(timeout: int = 10) -> List[Dict]:
+    def scan_network(timeout: int = 10) -> List[Device]:
         """Scan local network for devices"""
         prefix = get_network_prefix()
-        devices = []
-
-        # Use arp-scan if available, fallback to arp table
-        arp_result = run_cmd(f"sudo arp-scan -l 2>/dev/null || echo 'arp-scan not installed'", timeout=30)
-
-        if 'not installed' in arp_result:
-            # Fallback: just read arp table (already populated by normal network activity)
-            # Do a single broadcast ping to refresh arp table
-            run_cmd(f"ping -c 1 -b {prefix}.255 2>/dev/null || ping -c 1 {prefix}.1 2>/dev/null", timeout=5)
-            time.sleep(1)
-            arp_result = run_cmd("arp -a || cat /proc/net/arp")
-
-        # Parse results
-        for line in arp_result.split('\n'):
-            if prefix in line:
-                parts = line.split()
-                if len(parts) >= 2:
-                    ip = None
-                    mac = None
-                    for part in parts:
-                        if prefix in part:
-                            ip = part.strip('()')
-                        if ':' in part and len(part) == 17:
-                            mac = part.lower()
-                    if ip and mac:
-                        # Try to get hostname
-                        hostname = "unknown"
-                        try:
-                            hostname = socket.gethostbyaddr(ip)[0]
-                        except:
-                            pass
-                        devices.append({
-                            'ip': ip,
-                            'mac': mac,
-                            'hostname': hostname,
-                            'seen': datetime.now().isoformat()
-                        })
 
-        return devices
+        # Use arp-scan if available, fallback to arp table. Look it up on PATH
+        # first so hosts without it skip the sudo/shell round trip entirely.
+        arp_result = ''
+        if shutil.which('arp-scan') or Path('/usr/sbin/arp-scan').exists():
+            arp_result = run_cmd("sudo arp-scan -l 2>/dev/null", timeout=30)
+
+        if not ARP_LINE_RE.search(arp_result):
+            # Fallback: ping every host at once so the kernel ARP table is fresh
+            NetworkMonitor._ping_sweep(prefix)
+            try:
+                # Read the kernel neighbour table directly, no fork needed
+                arp_result = Path('/proc/net/arp').read_text()
+            except OSError:
+                arp_result = run_cmd("arp -a")
+
+        pairs = NetworkMonitor._parse_arp(arp_result, prefix)
+        NetworkMonitor._record_scan(pairs, full=True)
+        return NetworkMonitor._to_devices(pairs)
+
+    @staticmethod
+    def _parse_arp(arp_result: str, prefix: str) -> List[tuple]:
+        """(ip, mac) pairs on the local /24 from ARP-style output"""
+        # arp-scan, arp -a and /proc/net/arp all put IP before MAC
+        return [
+            (m['ip'], m['mac'].lower())
+            for m in ARP_LINE_RE.finditer(arp_result)
+            if m['ip'].startswith(prefix + '.') and m['mac'] != INCOMPLETE_MAC
+        ]
+
+    @staticmethod
+    def _to_devices(pairs: List[tuple]) -> List[Device]:
+        """Build Device rows for (ip, mac) pairs, resolving hostnames"""
+        hostnames = NetworkMonitor._resolve_hostnames(pairs)
+        seen = datetime.now().isoformat()
+        return [Device(ip, mac, hostname, seen) for (ip, mac), hostname in zip(pairs, hostnames)]
+
+    @staticmethod
+    def _record_scan(pairs: List[tuple], full: bool = False):
+        """Merge seen hosts into last_scan.json (written only when something changed)"""
+        last = load_json_cached(LAST_SCAN_FILE, {'ts': 0, 'macs': {}})
+        macs = last['macs']
+        now = datetime.now().isoformat()
+        changed = full
+        for ip, mac in pairs:
+            entry = macs.get(mac)
+            if entry is None:
+                macs[mac] = {'ip': ip, 'first_seen': now, 'last_seen': now}
+                changed = True
+            elif entry['ip'] != ip or full:
+                entry['ip'], entry['last_seen'] = ip, now
+                changed = True
+        if full:
+            last['ts'] = time.time()
+        if changed:
+            save_json(LAST_SCAN_FILE, last)
+
+    @staticmethod
+    def _resolve_hostnames(pairs: List[tuple]) -> List[str]:
+        """Resolve hostnames for (ip, mac) pairs, using the on-disk cache"""
+        cache = load_json(HOSTNAME_CACHE_FILE, {})
+        now = time.time()
+        hostnames = [None] * len(pairs)
+        misses = []
+
+        for i, (ip, mac) in enumerate(pairs):
+            hit = cache.get(mac)
+            if hit and hit['ip'] == ip and now - hit['ts'] < HOSTNAME_CACHE_TTL:
+                hostnames[i] = hit['hostname']
+            else:
+                misses.append(i)
+
+        if misses:
+            # PTR lookups block for up to seconds each; run them side by side
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                resolved = list(pool.map(reverse_lookup, [pairs[i][0] for i in misses]))
+            for i, hostname in zip(misses, resolved):
+                ip, mac = pairs[i]
+                hostnames[i] = hostname
+                cache[mac] = {'ip': ip, 'hostname': hostname, 'ts': now}
+            save_json(HOSTNAME_CACHE_FILE, cache)
+
+        return hostnames
+
+    @staticmethod
+    def _ping_sweep(prefix: str, timeout: float = 2.0):
+        """Send one ICMP echo to every host in prefix.1-254"""
+        ips = [f"{prefix}.{i}" for i in range(1, 255)]
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        except PermissionError:
+            # Raw sockets need root; fall back to concurrent ping processes
+            import asyncio
+            asyncio.run(NetworkMonitor._ping_sweep_async(ips))
+            return
+
+        with sock:
+            ident = os.getpid() & 0xFFFF
+            for seq, ip in enumerate(ips, 1):
+                header = struct.pack('!BBHHH', 8, 0, 0, ident, seq)
+                packet = struct.pack('!BBHHH', 8, 0, icmp_checksum(header), ident, seq)
+                try:
+                    sock.sendto(packet, (ip, 0))
+                except OSError:
+                    pass
+
+            # Drain replies until the network goes quiet so ARP entries settle
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                ready, _, _ = select.select([sock], [], [], remaining)
+                if not ready:
+                    break
+                sock.recv(1024)
+
+    @staticmethod
+    async def _ping_sweep_async(ips: List[str], limit: int = 128):
+        """Ping hosts with bounded concurrent ping subprocesses"""
+        import asyncio
+        sem = asyncio.Semaphore(limit)
+
+        async def ping(ip: str):
+            async with sem:
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        'ping', '-c', '1', '-W', '1', ip,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                    )
+                    await proc.wait()
+                except OSError:
+                    pass
+
+        await asyncio.gather(*(ping(ip) for ip in ips))
 
     @staticmethod
     def get_known_devices() -> Dict:
         """Get list of known/trusted devices"""
-        return load_json(KNOWN_DEVICES_FILE, {'trusted': {}, 'blocked': {}})
+        global _known_macs, _known_macs_source
+        data = load_json_cached(KNOWN_DEVICES_FILE, {'trusted': {}, 'blocked': {}})
+        if data is not _known_macs_source:
+            _known_macs = frozenset(data['trusted']) | frozenset(data['blocked'])
+            _known_macs_source = data
+        return data
 
     @staticmethod
     def add_known_device(mac: str, name: str, trusted: bool = True):
@@ -159,56 +435,122 @@ class NetworkMonitor:
         return f"ERROR: Device {mac} not found"
 
     @staticmethod
-    def check_new_devices() -> List[Dict]:
+    def check_new_devices() -> List[Device]:
         """Check for unknown devices on network"""
-        devices = NetworkMonitor.scan_network()
-        known = NetworkMonitor.get_known_devices()
+        last = load_json_cached(LAST_SCAN_FILE, {'ts': 0, 'macs': {}})
+        arp_result = None
+        if time.time() - last['ts'] <= FULL_SCAN_INTERVAL:
+            # Recent sweep: the kernel ARP table is current enough, no probing
+            try:
+                arp_result = Path('/proc/net/arp').read_text()
+            except OSError:
+                pass
 
-        unknown = []
-        for device in devices:
-            mac = device['mac'].lower()
-            if mac not in known['trusted'] and mac not in known['blocked']:
-                unknown.append(device)
+        if arp_result is None:
+            devices = NetworkMonitor.scan_network()
+        else:
+            pairs = NetworkMonitor._parse_arp(arp_result, get_network_prefix())
+            NetworkMonitor._record_scan(pairs)
+            devices = NetworkMonitor._to_devices(pairs)
 
-        return unknown
+        NetworkMonitor.get_known_devices()  # refreshes _known_macs if the file changed
+        return [d for d in devices if d.mac not in _known_macs]
 
     @staticmethod
-    def scan_ports(target_ip: str, ports: str = "common") -> Dict:
-        """Scan ports on target IP"""
-        if ports == "common":
-            port_list = [21, 22, 23, 25, 53, 80, 110, 139, 143, 443, 445, 993, 995, 3306, 3389, 5432, 5900, 8080, 8443]
-        elif ports == "full":
-            port_list = range(1, 1025)
-        else:
-            port_list = [int(p) for p in ports.split(',')]
+    def scan_ports(target_ip: str, ports=COMMON_PORTS, workers: int = 512) -> Dict:
+        """Scan ports on target IP, probing up to `workers` ports at once"""
+        port_list = parse_ports(ports) if isinstance(ports, str) else ports
 
         results = {'open': [], 'closed': 0, 'target': target_ip}
 
-        for port in port_list:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex((target_ip, port))
-                if result == 0:
-                    service = "unknown"
-                    try:
-                        service = socket.getservbyport(port)
-                    except:
-                        pass
-                    results['open'].append({'port': port, 'service': service})
-                else:
-                    results['closed'] += 1
-                sock.close()
-            except:
-                pass
+        # Resolve hostnames once instead of per connect_ex()
+        try:
+            address = socket.gethostbyname(target_ip)
+        except (OSError, UnicodeError) as e:
+            results['error'] = f"Cannot resolve {target_ip}: {e}"
+            return results
+
+        states = NetworkMonitor._scan_ports_select(address, port_list, limit=max(1, workers))
+
+        # Service lookup reads /etc/services; do it once per open port afterwards
+        for port, is_open in zip(port_list, states):
+            if is_open:
+                service = "unknown"
+                try:
+                    service = socket.getservbyport(port)
+                except:
+                    pass
+                results['open'].append({'port': port, 'service': service})
+            else:
+                results['closed'] += 1
 
         return results
 
+    @staticmethod
+    def _scan_ports_select(target_ip: str, port_list, timeout: float = 1.0,
+                           limit: int = 512) -> List[bool]:
+        """Probe ports with non-blocking connects, returning open/closed per port in order"""
+        ports = list(port_list)
+        states = [False] * len(ports)
+
+        # Batches of `limit` sockets cap open file descriptors
+        for base in range(0, len(ports), limit):
+            with selectors.DefaultSelector() as sel:
+                try:
+                    for i in range(base, min(base + limit, len(ports))):
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                        sock.setblocking(False)
+                        try:
+                            err = sock.connect_ex((target_ip, ports[i]))
+                        except (OSError, OverflowError):
+                            # Bad address or port number: count as closed
+                            sock.close()
+                            continue
+                        if err == 0:
+                            states[i] = True
+                            sock.close()
+                        elif err == errno.EINPROGRESS:
+                            sel.register(sock, selectors.EVENT_WRITE, i)
+                        else:
+                            sock.close()
+
+                    # Writable means the handshake finished; SO_ERROR says how
+                    deadline = time.monotonic() + timeout
+                    while sel.get_map():
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        for key, _ in sel.select(remaining):
+                            sock = key.fileobj
+                            states[key.data] = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                            sel.unregister(sock)
+                            sock.close()
+                finally:
+                    # Anything still pending timed out (filtered) or was left by an error
+                    for key in list(sel.get_map().values()):
+                        sel.unregister(key.fileobj)
+                        key.fileobj.close()
+
+        return states
+
 # ==================== 2. HONEYPOT ====================
 
+# Cached O_APPEND descriptor for the honeypot log
+_honeypot_log_fd: Optional[int] = None
+# Serialized entries waiting for the next batched write (daemon only)
+_honeypot_log_queue: Optional[List[bytes]] = None
+
 class Honeypot:
     """Lightweight honeypot to detect intrusion attempts"""
 
+    # Log size above which get_logs seeks to the tail instead of scanning
+    HONEYPOT_TAIL_THRESHOLD = 1024 * 1024
+
+    # The daemon writes queued log entries in one writev() every interval,
+    # or sooner once this many are waiting
+    LOG_BATCH_SIZE = 32
+    LOG_FLUSH_INTERVAL = 0.5
+
     FAKE_SERVICES = {
         'ssh': 2222,
         'ftp': 2121,
@@ -216,6 +558,13 @@ class Honeypot:
         'telnet': 2323
     }
 
+    FAKE_BANNERS = {
+        'ssh': b"SSH-2.0-OpenSSH_7.9p1 Debian-10+deb10u2\r\n",
+        'ftp': b"220 FTP Server Ready\r\n",
+        'http': b"HTTP/1.1 200 OK\r\nServer: Apache/2.4.41\r\n\r\n",
+        'telnet': b"Login: "
+    }
+
     @staticmethod
     def log_attempt(service: str, ip: str, data: str = ""):
         """Log intrusion attempt"""
@@ -226,125 +575,247 @@ class Honeypot:
             'data': data[:500]  # Limit data size
         }
 
-        with open(HONEYPOT_LOG_FILE, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        line = (json.dumps(entry) + '\n').encode()
+        if _honeypot_log_queue is None:
+            # O_APPEND makes each single write an atomic append, no locking needed
+            os.write(Honeypot._log_fd(), line)
+        else:
+            _honeypot_log_queue.append(line)
+            if len(_honeypot_log_queue) >= Honeypot.LOG_BATCH_SIZE:
+                Honeypot._flush_logs()
 
         return entry
 
+    @staticmethod
+    def _flush_logs():
+        """Append all queued log entries with a single writev()"""
+        if _honeypot_log_queue:
+            os.writev(Honeypot._log_fd(), _honeypot_log_queue)
+            _honeypot_log_queue.clear()
+
+    @staticmethod
+    def _log_fd() -> int:
+        """Get the append-only log descriptor, opening it on first use"""
+        global _honeypot_log_fd
+        if _honeypot_log_fd is None:
+            _honeypot_log_fd = os.open(HONEYPOT_LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            atexit.register(os.close, _honeypot_log_fd)
+        return _honeypot_log_fd
+
     @staticmethod
     def get_logs(limit: int = 50) -> List[Dict]:
         """Get honeypot logs"""
-        logs = []
         try:
-            with open(HONEYPOT_LOG_FILE, 'r') as f:
-                for line in f:
-                    try:
-                        logs.append(json.loads(line.strip()))
-                    except:
-                        pass
+            with open(HONEYPOT_LOG_FILE, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if limit > 0 and size > Honeypot.HONEYPOT_TAIL_THRESHOLD:
+                    # Large log: read a window at the end, ~1 KB per wanted
+                    # entry, doubling it until it holds `limit` whole lines
+                    # (escaped non-ASCII data can make entries longer)
+                    window = limit * 1024
+                    while True:
+                        start = max(0, size - window)
+                        f.seek(start)
+                        chunk = f.read(size - start)
+                        lines = chunk.splitlines(keepends=True)
+                        if start > 0:
+                            lines = lines[1:]  # drop the partial first line
+                        if len(lines) >= limit or start == 0:
+                            break
+                        window *= 2
+                    tail = lines[-limit:]
+                else:
+                    tail = deque(f, maxlen=limit if limit > 0 else None)
         except FileNotFoundError:
-            pass
+            return []
 
-        return logs[-limit:]
+        logs = []
+        for line in tail:
+            try:
+                logs.append(json.loads(line))
+            except:
+                pass
+        return logs
 
     @staticmethod
     def clear_logs():
         """Clear honeypot logs"""
-        HONEYPOT_LOG_FILE.unlink(missing_ok=True)
+        # Truncate rather than unlink so running services keep appending to the same file
+        try:
+            os.truncate(HONEYPOT_LOG_FILE, 0)
+        except FileNotFoundError:
+            pass
         return "OK: Honeypot logs cleared"
 
     @staticmethod
-    def start_service(service: str) -> str:
-        """Start a honeypot service (runs in background)"""
-        if service not in Honeypot.FAKE_SERVICES:
-            return f"ERROR: Unknown service. Available: {', '.join(Honeypot.FAKE_SERVICES.keys())}"
+    def _enabled_services() -> List[str]:
+        """Services the honeypot daemon should listen on"""
+        return load_json(HONEYPOT_SERVICES_FILE, {'services': []})['services']
 
-        port = Honeypot.FAKE_SERVICES[service]
-        script = f'''
-import socket
-import json
-from datetime import datetime
-
-def log_attempt(service, ip, data=""):
-    entry = {{"timestamp": datetime.now().isoformat(), "service": service, "source_ip": ip, "data": data[:500]}}
-    with open("{HONEYPOT_LOG_FILE}", "a") as f:
-        f.write(json.dumps(entry) + "\\n")
-    print(f"[HONEYPOT] {{service}} attempt from {{ip}}")
+    @staticmethod
+    def _listening_services(wait: float = 0) -> List[str]:
+        """Services the daemon managed to bind, waiting up to `wait` s for it to report"""
+        deadline = time.monotonic() + wait
+        while not HONEYPOT_LISTENING_FILE.exists():
+            if time.monotonic() >= deadline:
+                # No report (e.g. a daemon from an older version): trust the config
+                return Honeypot._enabled_services() if Honeypot._daemon_pid() else []
+            time.sleep(0.05)
+        return load_json(HONEYPOT_LISTENING_FILE, {'services': []})['services']
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-sock.bind(("0.0.0.0", {port}))
-sock.listen(5)
-print(f"[HONEYPOT] {service} listening on port {port}")
+    @staticmethod
+    def _daemon_pid() -> Optional[int]:
+        """PID of the running honeypot daemon, if any"""
+        try:
+            pid = int(HONEYPOT_PID_FILE.read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+        # Read the kernel's view directly; the cmdline check also guards
+        # against the PID having been reused by an unrelated process
+        try:
+            cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().split(b'\0')
+        except OSError:
+            return None
+        return pid if b'honeypot' in cmdline and b'serve' in cmdline else None
 
-while True:
-    try:
-        conn, addr = sock.accept()
-        data = ""
+    @staticmethod
+    def _stop_daemon():
+        """Stop the honeypot daemon and wait for its ports to be released"""
+        pid = Honeypot._daemon_pid()
+        HONEYPOT_PID_FILE.unlink(missing_ok=True)
+        if pid is None:
+            return
         try:
-            conn.settimeout(5)
-            if "{service}" == "ssh":
-                conn.send(b"SSH-2.0-OpenSSH_7.9p1 Debian-10+deb10u2\\r\\n")
-            elif "{service}" == "ftp":
-                conn.send(b"220 FTP Server Ready\\r\\n")
-            elif "{service}" == "http":
-                conn.send(b"HTTP/1.1 200 OK\\r\\nServer: Apache/2.4.41\\r\\n\\r\\n")
-            elif "{service}" == "telnet":
-                conn.send(b"Login: ")
-            data = conn.recv(1024).decode(errors="ignore")
-        except:
+            os.kill(pid, signal.SIGTERM)
+            for _ in range(50):
+                time.sleep(0.05)
+                os.kill(pid, 0)
+        except ProcessLookupError:
             pass
-        log_attempt("{service}", addr[0], data)
-        conn.close()
-    except:
-        pass
-'''
 
-        # Write script and run in background
-        script_file = CONFIG_DIR / f'honeypot_{service}.py'
-        with open(script_file, 'w') as f:
-            f.write(script)
+    @staticmethod
+    def _restart_daemon(services: List[str]):
+        """(Re)launch the daemon for the given services, or stop it if none"""
+        save_json(HONEYPOT_SERVICES_FILE, {'services': services})
+        Honeypot._stop_daemon()
+        HONEYPOT_LISTENING_FILE.unlink(missing_ok=True)
+        if services:
+            script = Path(__file__).resolve()
+            run_cmd(f"{sys.executable} {script} honeypot serve > /dev/null 2>&1 & echo $! > {HONEYPOT_PID_FILE}")
 
-        pid_file = CONFIG_DIR / f'honeypot_{service}.pid'
-        run_cmd(f"python3 {script_file} > /dev/null 2>&1 & echo $! > {pid_file}")
+    @staticmethod
+    async def run_all_async(services: List[str]):
+        """Serve all given fake services from one event loop"""
+        import asyncio
+        global _honeypot_log_queue
+        _honeypot_log_queue = []
+
+        async def flush_periodically():
+            while True:
+                await asyncio.sleep(Honeypot.LOG_FLUSH_INTERVAL)
+                Honeypot._flush_logs()
+
+        def make_handler(service: str):
+            banner = Honeypot.FAKE_BANNERS[service]
+
+            async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+                ip = writer.get_extra_info('peername')[0]
+                data = ""
+                try:
+                    writer.write(banner)
+                    await writer.drain()
+                    raw = await asyncio.wait_for(reader.read(1024), timeout=5)
+                    data = raw.decode(errors="ignore")
+                except (OSError, asyncio.TimeoutError):
+                    pass
+                Honeypot.log_attempt(service, ip, data)
+                print(f"[HONEYPOT] {service} attempt from {ip}")
+                writer.close()
 
+            return handle
+
+        # Bind one by one so a port already in use only skips that service
+        servers, listening = [], []
+        for svc in services:
+            port = Honeypot.FAKE_SERVICES[svc]
+            try:
+                servers.append(await asyncio.start_server(make_handler(svc), '0.0.0.0', port))
+            except OSError as e:
+                print(f"[HONEYPOT] {svc} failed to listen on port {port}: {e}", file=sys.stderr)
+                continue
+            listening.append(svc)
+            print(f"[HONEYPOT] {svc} listening on port {port}")
+
+        # Tells start_service which services actually came up
+        save_json(HONEYPOT_LISTENING_FILE, {'services': listening})
+        if not servers:
+            return
+
+        # 'honeypot stop' sends SIGTERM; unwind so queued entries get written
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await asyncio.gather(flush_periodically(), *(server.serve_forever() for server in servers))
+        finally:
+            Honeypot._flush_logs()
+
+    @staticmethod
+    def start_service(service: str) -> str:
+        """Start a honeypot service (runs in background)"""
+        if service not in Honeypot.FAKE_SERVICES:
+            return f"ERROR: Unknown service. Available: {', '.join(Honeypot.FAKE_SERVICES.keys())}"
+
+        # All services share one background process; restart it with the new set
+        services = Honeypot._enabled_services() if Honeypot._daemon_pid() else []
+        if service not in services:
+            services.append(service)
+        Honeypot._restart_daemon(services)
+
+        port = Honeypot.FAKE_SERVICES[service]
+        if service not in Honeypot._listening_services(wait=2.0):
+            return f"ERROR: Honeypot {service} could not listen on port {port} (already in use?)"
         return f"OK: Honeypot {service} started on port {port}"
 
     @staticmethod
     def stop_service(service: str) -> str:
         """Stop a honeypot service"""
-        pid_file = CONFIG_DIR / f'honeypot_{service}.pid'
-        if pid_file.exists():
-            pid = pid_file.read_text().strip()
-            run_cmd(f"kill {pid} 2>/dev/null")
-            pid_file.unlink()
+        services = Honeypot._enabled_services() if Honeypot._daemon_pid() else []
+        if service in services:
+            services.remove(service)
+            Honeypot._restart_daemon(services)
             return f"OK: Honeypot {service} stopped"
         return f"ERROR: Honeypot {service} not running"
 
     @staticmethod
     def status() -> Dict:
         """Get honeypot status"""
-        status = {}
-        for service in Honeypot.FAKE_SERVICES:
-            pid_file = CONFIG_DIR / f'honeypot_{service}.pid'
-            if pid_file.exists():
-                pid = pid_file.read_text().strip()
-                check = run_cmd(f"ps -p {pid} -o pid= 2>/dev/null")
-                status[service] = 'running' if pid in check else 'stopped'
-            else:
-                status[service] = 'stopped'
-        return status
+        running = Honeypot._listening_services() if Honeypot._daemon_pid() else []
+        return {
+            service: 'running' if service in running else 'stopped'
+            for service in Honeypot.FAKE_SERVICES
+        }
 
 # ==================== 3. WIFI SECURITY ====================
 
+# Fields of `iwlist <iface> scan` output
+IWLIST_CELL_RE = re.compile(r'^\s*Cell \d+ - ', re.MULTILINE)
+IWLIST_ESSID_RE = re.compile(r'ESSID:(?:"(?P<ssid>[^"]*)")?')
+IWLIST_QUALITY_RE = re.compile(r'Quality=(?P<quality>\S+)')
+IWLIST_ENC_RE = re.compile(r'Encryption key:(?P<enc>\w+)')
+
 class WiFiSecurity:
     """WiFi security auditing tools"""
 
     @staticmethod
     def get_interface() -> str:
         """Get wireless interface name"""
-        result = run_cmd("iw dev | grep Interface | awk '{print $2}'")
-        return result.strip().split('\n')[0] if result.strip() else "wlan0"
+        # Wireless interfaces expose a 'wireless' dir in sysfs
+        try:
+            for iface in sorted(Path('/sys/class/net').iterdir()):
+                if (iface / 'wireless').exists():
+                    return iface.name
+        except OSError:
+            pass
+        return "wlan0"
 
     @staticmethod
     def audit() -> Dict:
@@ -387,39 +858,34 @@ class WiFiSecurity:
         return results
 
     @staticmethod
-    def list_clients() -> List[Dict]:
+    def list_clients() -> List[Device]:
         """List devices connected to the network"""
         # This requires the Pi to be the AP or have access to router
         # Using ARP table as fallback
         return NetworkMonitor.scan_network()
 
     @staticmethod
+    @ttl_cache(30)
     def scan_networks() -> List[Dict]:
         """Scan for nearby WiFi networks"""
         iface = WiFiSecurity.get_interface()
-        result = run_cmd(f"sudo iwlist {iface} scan 2>/dev/null | grep -E 'ESSID|Quality|Encryption'")
+        result = run_cmd(f"sudo iwlist {iface} scan 2>/dev/null")
 
+        # iwlist prints Quality and Encryption before ESSID within each cell,
+        # so parse cell by cell rather than line by line
         networks = []
-        current = {}
-
-        for line in result.split('\n'):
-            line = line.strip()
-            if 'ESSID:' in line:
-                if current:
-                    networks.append(current)
-                current = {'ssid': line.split('ESSID:"')[1].rstrip('"') if 'ESSID:"' in line else 'hidden'}
-            elif 'Quality=' in line:
-                # Quality=70/100
-                try:
-                    quality = line.split('Quality=')[1].split()[0]
-                    current['quality'] = quality
-                except:
-                    pass
-            elif 'Encryption key:' in line:
-                current['encrypted'] = 'on' in line.lower()
-
-        if current:
-            networks.append(current)
+        for cell in IWLIST_CELL_RE.split(result)[1:]:
+            net = {}
+            m = IWLIST_ESSID_RE.search(cell)
+            if m:
+                net['ssid'] = m['ssid'] if m['ssid'] is not None else 'hidden'
+            m = IWLIST_QUALITY_RE.search(cell)
+            if m:
+                net['quality'] = m['quality']  # e.g. 70/100
+            m = IWLIST_ENC_RE.search(cell)
+            if m:
+                net['encrypted'] = m['enc'].lower() == 'on'
+            networks.append(net)
 
         return networks
 
@@ -437,9 +903,12 @@ class BreachChecker:
     HIBP_API = "https://haveibeenpwned.com/api/v3"
 
     @staticmethod
+    @ttl_cache(3600)
     def check_email(email: str) -> Dict:
         """Check if email appears in known breaches (requires API key)"""
         # Using the password API which is free
+        import urllib.request
+        import urllib.error
         result = {'email': email, 'breaches': [], 'error': None}
 
         try:
@@ -466,38 +935,86 @@ class BreachChecker:
         return result
 
     @staticmethod
-    def check_password(password: str) -> Dict:
-        """Check if password appears in known breaches (k-anonymity, safe)"""
-        # Hash password with SHA1
-        sha1 = hashlib.sha1(password.encode()).hexdigest().upper()
-        prefix = sha1[:5]
-        suffix = sha1[5:]
+    def _get_hibp_bucket(prefix: str) -> str:
+        """Fetch the k-anonymity range for a 5-char SHA1 prefix (cached a day)"""
+        path = HIBP_CACHE_DIR / prefix
+        try:
+            if time.time() - path.stat().st_mtime < HIBP_CACHE_TTL:
+                return path.read_text()
+        except OSError:
+            pass
 
-        result = {'compromised': False, 'count': 0}
+        url = f"https://api.pwnedpasswords.com/range/{prefix}"
+        bucket = http_get(url, headers={'User-Agent': 'Moltbot-Security'}, timeout=10).decode()
 
+        # The set of cached prefixes hints at the passwords checked: keep it 0600
         try:
-            url = f"https://api.pwnedpasswords.com/range/{prefix}"
-            req = urllib.request.Request(url, headers={'User-Agent': 'Moltbot-Security'})
-            response = urllib.request.urlopen(req, timeout=10)
-            data = response.read().decode()
-
-            for line in data.split('\n'):
-                if ':' in line:
-                    hash_suffix, count = line.strip().split(':')
-                    if hash_suffix == suffix:
-                        result['compromised'] = True
-                        result['count'] = int(count)
-                        break
+            HIBP_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = path.with_name(f".{prefix}.{os.getpid()}.{threading.get_ident()}")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(bucket)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+        return bucket
+
+    @staticmethod
+    def _sha1_split(password: str) -> tuple:
+        """(prefix, suffix) of the password's uppercase SHA1 hex digest"""
+        # Hash password with SHA1 (only a lookup key here, not a security use)
+        sha1 = hashlib.sha1(password.encode(), usedforsecurity=False).hexdigest().upper()
+        return sha1[:5], sha1[5:]
+
+    @staticmethod
+    def _match_bucket(bucket: str, suffix: str) -> Dict:
+        """Look a hash suffix up in a range response"""
+        # Each line is 'SUFFIX:COUNT', so 'suffix:' can only match at a line start
+        i = bucket.find(suffix + ':')
+        if i < 0:
+            return {'compromised': False, 'count': 0}
+        end = bucket.find('\n', i)
+        count = bucket[i + len(suffix) + 1:end if end >= 0 else None].strip()
+        return {'compromised': True, 'count': int(count)}
 
+    @staticmethod
+    def check_password(password: str) -> Dict:
+        """Check if password appears in known breaches (k-anonymity, safe)"""
+        prefix, suffix = BreachChecker._sha1_split(password)
+        try:
+            return BreachChecker._match_bucket(BreachChecker._get_hibp_bucket(prefix), suffix)
         except Exception as e:
-            result['error'] = str(e)
+            return {'compromised': False, 'count': 0, 'error': str(e)}
 
-        return result
+    @staticmethod
+    def check_passwords(passwords: List[str], limit: int = 8) -> List[Dict]:
+        """Check several passwords, fetching each hash prefix only once"""
+        by_prefix = defaultdict(list)
+        for i, password in enumerate(passwords):
+            prefix, suffix = BreachChecker._sha1_split(password)
+            by_prefix[prefix].append((i, suffix))
+
+        results: List[Dict] = [None] * len(passwords)
+
+        def fetch(prefix: str):
+            try:
+                bucket = BreachChecker._get_hibp_bucket(prefix)
+            except Exception as e:
+                for i, _ in by_prefix[prefix]:
+                    results[i] = {'compromised': False, 'count': 0, 'error': str(e)}
+                return
+            for i, suffix in by_prefix[prefix]:
+                results[i] = BreachChecker._match_bucket(bucket, suffix)
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=limit) as pool:
+            list(pool.map(fetch, by_prefix))
+        return results
 
     @staticmethod
     def add_monitor(email: str) -> str:
         """Add email to breach monitoring list"""
-        data = load_json(BREACH_MONITOR_FILE, {'emails': []})
+        data = load_json_cached(BREACH_MONITOR_FILE, {'emails': []})
         if email not in data['emails']:
             data['emails'].append(email)
             save_json(BREACH_MONITOR_FILE, data)
@@ -507,7 +1024,7 @@ class BreachChecker:
     @staticmethod
     def remove_monitor(email: str) -> str:
         """Remove email from monitoring"""
-        data = load_json(BREACH_MONITOR_FILE, {'emails': []})
+        data = load_json_cached(BREACH_MONITOR_FILE, {'emails': []})
         if email in data['emails']:
             data['emails'].remove(email)
             save_json(BREACH_MONITOR_FILE, data)
@@ -517,50 +1034,102 @@ class BreachChecker:
     @staticmethod
     def list_monitored() -> List[str]:
         """List monitored emails"""
-        data = load_json(BREACH_MONITOR_FILE, {'emails': []})
+        data = load_json_cached(BREACH_MONITOR_FILE, {'emails': []})
         return data['emails']
 
+    @staticmethod
+    def check_monitored() -> List[Dict]:
+        """Run check_email for every monitored email"""
+        # check_email makes no HIBP request without an API key (and caches its
+        # result), so a plain loop is enough; no rate limiting needed yet
+        return [BreachChecker.check_email(email) for email in BreachChecker.list_monitored()]
+
 # ==================== 5. TOTP AUTHENTICATOR ====================
 
+# Vault key, read (or derived) once per process
+_VAULT_KEY_CACHE: Optional[bytes] = None
+
+# Decrypted vault and the file stamp it was read at
+_vault_cache: Optional[tuple] = None
+
+# Header marking an AES-GCM vault; older vaults are base64 XOR text
+VAULT_MAGIC = b'MBV1'
+
 class TOTPAuthenticator:
     """TOTP 2FA code generator with encrypted vault"""
 
     @staticmethod
     def _get_vault_key() -> bytes:
         """Get or create vault encryption key"""
+        global _VAULT_KEY_CACHE
+        if _VAULT_KEY_CACHE is not None:
+            return _VAULT_KEY_CACHE
+
         key_file = CONFIG_DIR / '.vault_key'
         if key_file.exists():
-            return key_file.read_bytes()
+            key = key_file.read_bytes()
         else:
             # Generate from machine-specific data
             machine_id = run_cmd("cat /etc/machine-id 2>/dev/null || echo 'moltbot'").strip()
             key = hashlib.pbkdf2_hmac('sha256', machine_id.encode(), b'moltbot-totp', 100000)
             key_file.write_bytes(key)
             key_file.chmod(0o600)
-            return key
+
+        _VAULT_KEY_CACHE = key
+        return key
+
+    @staticmethod
+    def _xor(data_bytes: bytes, key: bytes) -> bytes:
+        """XOR data with a repeating key using one big-int operation"""
+        n = len(data_bytes)
+        key_tiled = (key * (n // len(key) + 1))[:n]
+        return (int.from_bytes(data_bytes, 'big') ^ int.from_bytes(key_tiled, 'big')).to_bytes(n, 'big')
 
     @staticmethod
     def _encrypt(data: str) -> bytes:
-        """Simple XOR encryption (for demo - use proper crypto in production)"""
+        """Encrypt vault data with AES-GCM (XOR if cryptography is missing)"""
         key = TOTPAuthenticator._get_vault_key()
-        data_bytes = data.encode()
-        encrypted = bytes([data_bytes[i] ^ key[i % len(key)] for i in range(len(data_bytes))])
+        AESGCM = _aesgcm()
+        if AESGCM:
+            # Layout: magic + 12-byte nonce + ciphertext/tag, stored raw
+            nonce = os.urandom(12)
+            return VAULT_MAGIC + nonce + AESGCM(key).encrypt(nonce, data.encode(), None)
+        # Legacy XOR format (for demo - install cryptography for real protection)
+        encrypted = TOTPAuthenticator._xor(data.encode(), key)
         return base64.b64encode(encrypted)
 
     @staticmethod
     def _decrypt(encrypted: bytes) -> str:
-        """Decrypt data"""
+        """Decrypt data (AES-GCM or legacy XOR vault)"""
         key = TOTPAuthenticator._get_vault_key()
-        data_bytes = base64.b64decode(encrypted)
-        decrypted = bytes([data_bytes[i] ^ key[i % len(key)] for i in range(len(data_bytes))])
+        if encrypted.startswith(VAULT_MAGIC):
+            blob = encrypted[len(VAULT_MAGIC):]
+            return _aesgcm()(key).decrypt(blob[:12], blob[12:], None).decode()
+        decrypted = TOTPAuthenticator._xor(base64.b64decode(encrypted), key)
         return decrypted.decode()
 
     @staticmethod
     def _load_vault() -> Dict:
-        """Load TOTP vault"""
+        """Load TOTP vault (decrypted once per change of the file)"""
+        global _vault_cache
+        stamp = _file_stamp(TOTP_VAULT_FILE)
+        if _vault_cache and _vault_cache[0] == stamp:
+            return _vault_cache[1]
+        vault = TOTPAuthenticator._read_vault()
+        _vault_cache = (stamp, vault)
+        return vault
+
+    @staticmethod
+    def _read_vault() -> Dict:
+        """Read and decrypt the TOTP vault file"""
         if TOTP_VAULT_FILE.exists():
+            encrypted = TOTP_VAULT_FILE.read_bytes()
+            if encrypted.startswith(VAULT_MAGIC) and not _aesgcm():
+                # Never fall through to an empty vault here: the next save would overwrite it
+                print("ERROR: 2FA vault is AES-GCM encrypted")
+                print("Run: pip install cryptography")
+                sys.exit(1)
             try:
-                encrypted = TOTP_VAULT_FILE.read_bytes()
                 return json.loads(TOTPAuthenticator._decrypt(encrypted))
             except:
                 pass
@@ -569,13 +1138,16 @@ class TOTPAuthenticator:
     @staticmethod
     def _save_vault(data: Dict):
         """Save TOTP vault"""
+        global _vault_cache
+        _vault_cache = None
         encrypted = TOTPAuthenticator._encrypt(json.dumps(data))
         TOTP_VAULT_FILE.write_bytes(encrypted)
         TOTP_VAULT_FILE.chmod(0o600)
 
     @staticmethod
-    def generate_totp(secret: str, digits: int = 6, interval: int = 30) -> str:
-        """Generate TOTP code from secret"""
+    @functools.lru_cache(maxsize=None)
+    def _decode_secret(secret: str) -> Optional[bytes]:
+        """Decode a Base32 secret to key bytes (None if invalid)"""
         # Clean secret (remove spaces, uppercase)
         secret = secret.replace(' ', '').upper()
 
@@ -585,16 +1157,25 @@ class TOTPAuthenticator:
             secret += '=' * padding
 
         try:
-            key = base64.b32decode(secret)
+            return base64.b32decode(secret)
         except:
-            return "ERROR: Invalid secret format"
+            return None
+
+    @staticmethod
+    def generate_totp(secret, digits: int = 6, interval: int = 30) -> str:
+        """Generate TOTP code from raw key bytes or a Base32 secret string"""
+        key = secret
+        if isinstance(secret, str):
+            key = TOTPAuthenticator._decode_secret(secret)
+            if key is None:
+                return "ERROR: Invalid secret format"
 
         # Get current time counter
-        counter = int(time.time()) // interval
-        counter_bytes = struct.pack('>Q', counter)
+        now = int(time.time())
+        counter_bytes = (now // interval).to_bytes(8, 'big')
 
-        # Generate HMAC-SHA1
-        hmac_hash = hmac.new(key, counter_bytes, hashlib.sha1).digest()
+        # Generate HMAC-SHA1 (one-shot, no HMAC object)
+        hmac_hash = hmac.digest(key, counter_bytes, 'sha1')
 
         # Dynamic truncation
         offset = hmac_hash[-1] & 0x0F
@@ -603,16 +1184,21 @@ class TOTPAuthenticator:
         code %= 10 ** digits
 
         # Calculate time remaining
-        remaining = interval - (int(time.time()) % interval)
+        remaining = interval - (now % interval)
 
         return f"{code:0{digits}d} (expires in {remaining}s)"
 
     @staticmethod
     def add_secret(name: str, secret: str) -> str:
         """Add TOTP secret to vault"""
+        # Decode Base32 once here; the vault keeps the raw key (base64)
+        key = TOTPAuthenticator._decode_secret(secret)
+        if key is None:
+            return "ERROR: Invalid secret format"
+
         vault = TOTPAuthenticator._load_vault()
         vault['secrets'][name.lower()] = {
-            'secret': secret.replace(' ', '').upper(),
+            'key': base64.b64encode(key).decode(),
             'added': datetime.now().isoformat()
         }
         TOTPAuthenticator._save_vault(vault)
@@ -633,8 +1219,11 @@ class TOTPAuthenticator:
         """Get current TOTP code for service"""
         vault = TOTPAuthenticator._load_vault()
         if name.lower() in vault['secrets']:
-            secret = vault['secrets'][name.lower()]['secret']
-            return TOTPAuthenticator.generate_totp(secret)
+            entry = vault['secrets'][name.lower()]
+            if 'key' in entry:
+                return TOTPAuthenticator.generate_totp(base64.b64decode(entry['key']))
+            # Entries added before raw keys were stored hold the Base32 string
+            return TOTPAuthenticator.generate_totp(entry['secret'])
         return f"ERROR: {name} not found. Add with: /2fa add {name} <secret>"
 
     @staticmethod
@@ -662,12 +1251,12 @@ class DNSControl:
         return None
 
     @staticmethod
+    @ttl_cache(30)
     def status() -> Dict:
         """Get Pi-hole status"""
         try:
             url = f"{DNSControl.PIHOLE_API}?summary"
-            response = urllib.request.urlopen(url, timeout=5)
-            return json.loads(response.read().decode())
+            return json.loads(http_get(url, timeout=5).decode())
         except Exception as e:
             return {'error': str(e), 'installed': False}
 
@@ -679,7 +1268,8 @@ class DNSControl:
             return "ERROR: Pi-hole not installed or no API token"
         try:
             url = f"{DNSControl.PIHOLE_API}?enable&auth={token}"
-            urllib.request.urlopen(url, timeout=5)
+            http_get(url, timeout=5)
+            DNSControl.status.cache_clear()
             return "OK: Pi-hole enabled"
         except Exception as e:
             return f"ERROR: {e}"
@@ -692,7 +1282,8 @@ class DNSControl:
             return "ERROR: Pi-hole not installed or no API token"
         try:
             url = f"{DNSControl.PIHOLE_API}?disable={duration}&auth={token}"
-            urllib.request.urlopen(url, timeout=5)
+            http_get(url, timeout=5)
+            DNSControl.status.cache_clear()
             return f"OK: Pi-hole disabled for {duration}s"
         except Exception as e:
             return f"ERROR: {e}"
@@ -709,6 +1300,25 @@ class DNSControl:
         result = run_cmd(f"pihole -b -d {domain} 2>&1")
         return f"Unblock {domain}: {result.strip()}" if result else f"OK: Unblocked {domain}"
 
+    @staticmethod
+    def block_domains(domains: List[str]) -> str:
+        """Add several domains to the blacklist with one pihole call"""
+        if not domains:
+            return "ERROR: No domains given"
+        # One invocation means one gravity reload instead of one per domain
+        quoted = ' '.join(shlex.quote(d) for d in domains)
+        result = run_cmd(f"pihole -b {quoted} 2>&1", timeout=120)
+        return f"Block {len(domains)} domains: {result.strip()}" if result else f"OK: Blocked {len(domains)} domains"
+
+    @staticmethod
+    def unblock_domains(domains: List[str]) -> str:
+        """Remove several domains from the blacklist with one pihole call"""
+        if not domains:
+            return "ERROR: No domains given"
+        quoted = ' '.join(shlex.quote(d) for d in domains)
+        result = run_cmd(f"pihole -b -d {quoted} 2>&1", timeout=120)
+        return f"Unblock {len(domains)} domains: {result.strip()}" if result else f"OK: Unblocked {len(domains)} domains"
+
     @staticmethod
     def whitelist_domain(domain: str) -> str:
         """Add domain to whitelist"""
@@ -723,6 +1333,7 @@ class VPNControl:
     WG_CONFIG_DIR = Path("/etc/wireguard")
 
     @staticmethod
+    @ttl_cache(10)
     def status() -> Dict:
         """Get WireGuard status"""
         result = run_cmd("sudo wg show 2>/dev/null")
@@ -745,22 +1356,58 @@ class VPNControl:
     @staticmethod
     def generate_keys() -> Dict:
         """Generate WireGuard key pair"""
-        private_key = run_cmd("wg genkey").strip()
-        public_key = run_cmd(f"echo '{private_key}' | wg pubkey").strip()
+        try:
+            # WireGuard keys are plain X25519: no need to fork wg twice
+            from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+            from cryptography.hazmat.primitives import serialization
+        except ImportError:
+            # Pipe the private key through stdin so it never shows up in ps
+            try:
+                private_key = subprocess.run(['wg', 'genkey'], capture_output=True,
+                                             text=True, check=True).stdout.strip()
+                public_key = subprocess.run(['wg', 'pubkey'], input=private_key, capture_output=True,
+                                            text=True, check=True).stdout.strip()
+            except (OSError, subprocess.CalledProcessError) as e:
+                private_key = public_key = f"ERROR: {e}"
+        else:
+            raw = serialization.Encoding.Raw
+            key = X25519PrivateKey.generate()
+            private_key = base64.b64encode(key.private_bytes(
+                raw, serialization.PrivateFormat.Raw, serialization.NoEncryption())).decode()
+            public_key = base64.b64encode(key.public_key().public_bytes(
+                raw, serialization.PublicFormat.Raw)).decode()
 
         return {
             'private_key': private_key,
             'public_key': public_key
         }
 
+    @staticmethod
+    def _peer_octet(name: str) -> Optional[int]:
+        """Last address octet for a peer, allocated once and kept across runs"""
+        peers = load_json(VPN_PEERS_FILE, {})
+        if name in peers:
+            return peers[name]
+
+        used = set(peers.values())
+        octet = next((i for i in range(2, 252) if i not in used), None)
+        if octet is not None:
+            peers[name] = octet
+            save_json(VPN_PEERS_FILE, peers)
+        return octet
+
     @staticmethod
     def create_peer(name: str, server_public_key: str, endpoint: str, allowed_ips: str = "0.0.0.0/0") -> str:
         """Generate peer configuration"""
+        octet = VPNControl._peer_octet(name)
+        if octet is None:
+            return "ERROR: No free peer addresses in 10.0.0.0/24"
+
         keys = VPNControl.generate_keys()
 
         config = f"""[Interface]
 PrivateKey = {keys['private_key']}
-Address = 10.0.0.{hash(name) % 250 + 2}/32
+Address = 10.0.0.{octet}/32
 DNS = 1.1.1.1
 
 [Peer]
@@ -788,16 +1435,27 @@ To connect:
     def up(interface: str = "wg0") -> str:
         """Bring up WireGuard interface"""
         result = run_cmd(f"sudo wg-quick up {interface} 2>&1")
+        VPNControl.status.cache_clear()
         return f"WireGuard {interface}: {result.strip()}"
 
     @staticmethod
     def down(interface: str = "wg0") -> str:
         """Bring down WireGuard interface"""
         result = run_cmd(f"sudo wg-quick down {interface} 2>&1")
+        VPNControl.status.cache_clear()
         return f"WireGuard {interface}: {result.strip()}"
 
 # ==================== CLI INTERFACE ====================
 
+# Section rules shared by the CLI output blocks
+SEP30 = '-' * 30
+SEP40 = '-' * 40
+SEP50 = '-' * 50
+
+def emit(lines: List[str]):
+    """Write a block of output lines with a single write() call"""
+    sys.stdout.write('\n'.join(lines) + '\n')
+
 def print_help():
     """Print help message"""
     help_text = """
@@ -807,6 +1465,7 @@ MOLTBOT SECURITY TOOLS v1.0.0
 NETWORK MONITOR:
   scan                    - Scan network for devices
   scan ports <ip> [ports] - Scan ports on target
+                            (--workers N: parallel probes, default 512)
   devices                 - List known devices
   devices add <mac> <name> - Add trusted device
   devices remove <mac>    - Remove device
@@ -827,9 +1486,11 @@ WIFI SECURITY:
 BREACH CHECKER:
   breach email <email>    - Check email for breaches
   breach password <pass>  - Check password (safe k-anonymity)
+  breach password-file <path> - Check one password per line
   breach monitor <email>  - Add email to monitoring
   breach unmonitor <email> - Remove from monitoring
   breach list             - List monitored emails
+  breach check-all        - Check every monitored email
 
 2FA AUTHENTICATOR:
   2fa add <name> <secret> - Add TOTP secret
@@ -844,6 +1505,8 @@ DNS (PI-HOLE):
   dns block <domain>      - Block domain
   dns unblock <domain>    - Unblock domain
   dns whitelist <domain>  - Whitelist domain
+  dns block-file <path>   - Block every domain in a file (one pihole call)
+  dns unblock-file <path> - Unblock every domain in a file
 
 VPN (WIREGUARD):
   vpn status              - WireGuard status
@@ -861,247 +1524,356 @@ EXAMPLES:
 """
     print(help_text)
 
-def main():
-    if len(sys.argv) < 2:
-        print_help()
+# ---- Network Monitor ----
+
+def cmd_scan(args: List[str]):
+    """scan | scan ports <ip> [port_list] [--workers N]"""
+    if not args or args[0] != 'ports':
+        devices = NetworkMonitor.scan_network()
+        lines = ["NETWORK SCAN", SEP50]
+        for d in devices:
+            lines.append(f"  {d.ip:15} {d.mac:17} {d.hostname}")
+        lines.append(f"\nTotal: {len(devices)} devices")
+        emit(lines)
         return
 
-    cmd = sys.argv[1].lower()
-    args = sys.argv[2:]
+    workers = 512
+    if '--workers' in args:
+        i = args.index('--workers')
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            print("ERROR: --workers needs a number")
+            return
+        del args[i:i + 2]
+    if len(args) < 2:
+        print("Usage: scan ports <ip> [port_list] [--workers N]")
+        return
+    target = args[1]
+    try:
+        ports = parse_ports(args[2]) if len(args) > 2 else COMMON_PORTS
+    except ValueError:
+        print(f"ERROR: Invalid port list: {args[2]}")
+        return
+    result = NetworkMonitor.scan_ports(target, ports, workers=workers)
+    if result.get('error'):
+        print(f"ERROR: {result['error']}")
+        return
+    lines = [f"PORT SCAN: {result['target']}", SEP40]
+    if result['open']:
+        for p in result['open']:
+            lines.append(f"  {p['port']}/tcp  OPEN  ({p['service']})")
+    else:
+        lines.append("  No open ports found")
+    lines.append(f"\n{result['closed']} ports closed")
+    emit(lines)
+
+def _devices_list(args: List[str]):
+    """devices"""
+    known = NetworkMonitor.get_known_devices()
+    lines = ["KNOWN DEVICES", SEP40]
+    for title, key in (("\nTrusted:", 'trusted'), ("\nBlocked:", 'blocked')):
+        lines.append(title)
+        lines.extend([f"  {mac}  {info.get('name', 'unnamed')}" for mac, info in known.get(key, {}).items()])
+    emit(lines)
+
+DEVICES_COMMANDS = {
+    'add': (lambda a: print(NetworkMonitor.add_known_device(a[0], ' '.join(a[1:]))), 2),
+    'remove': (lambda a: print(NetworkMonitor.remove_known_device(a[0])), 1),
+}
+
+def cmd_devices(args: List[str]):
+    """devices | devices add <mac> <name> | devices remove <mac>"""
+    if not args:
+        _devices_list(args)
+    else:
+        dispatch(DEVICES_COMMANDS, "Usage: devices add <mac> <name> | devices remove <mac>", args)
+
+def cmd_alerts(args: List[str]):
+    """alerts"""
+    unknown = NetworkMonitor.check_new_devices()
+    lines = []
+    if unknown:
+        lines = ["UNKNOWN DEVICES DETECTED!", SEP40]
+        for d in unknown:
+            lines.append(f"  {d.ip:15} {d.mac}")
+    else:
+        lines.append("No unknown devices found")
+    emit(lines)
+
+# ---- Honeypot ----
+
+def _honeypot_status(args: List[str]):
+    """honeypot status"""
+    status = Honeypot.status()
+    lines = ["HONEYPOT STATUS", SEP30]
+    for svc, state in status.items():
+        icon = "●" if state == 'running' else "○"
+        lines.append(f"  {icon} {svc}: {state}")
+    emit(lines)
+
+def _honeypot_logs(args: List[str]):
+    """honeypot logs [n]"""
+    limit = int(args[0]) if args else 20
+    logs = Honeypot.get_logs(limit)
+    lines = [f"HONEYPOT LOGS (last {limit})", SEP50]
+    for log in logs:
+        lines.append(f"  [{log['timestamp'][:19]}] {log['service']:6} from {log['source_ip']}")
+    emit(lines)
+
+def _honeypot_serve(args: List[str]):
+    """honeypot serve: foreground daemon launched by 'honeypot start'"""
+    import asyncio
+    try:
+        asyncio.run(Honeypot.run_all_async(Honeypot._enabled_services()))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
 
-    # Network Monitor
-    if cmd == 'scan':
-        if args and args[0] == 'ports':
-            if len(args) < 2:
-                print("Usage: scan ports <ip> [port_list]")
-                return
-            target = args[1]
-            ports = args[2] if len(args) > 2 else "common"
-            result = NetworkMonitor.scan_ports(target, ports)
-            print(f"PORT SCAN: {result['target']}")
-            print("-" * 40)
-            if result['open']:
-                for p in result['open']:
-                    print(f"  {p['port']}/tcp  OPEN  ({p['service']})")
-            else:
-                print("  No open ports found")
-            print(f"\n{result['closed']} ports closed")
-        else:
-            devices = NetworkMonitor.scan_network()
-            print("NETWORK SCAN")
-            print("-" * 50)
-            for d in devices:
-                print(f"  {d['ip']:15} {d['mac']:17} {d['hostname']}")
-            print(f"\nTotal: {len(devices)} devices")
-
-    elif cmd == 'devices':
-        if args:
-            if args[0] == 'add' and len(args) >= 3:
-                print(NetworkMonitor.add_known_device(args[1], ' '.join(args[2:])))
-            elif args[0] == 'remove' and len(args) >= 2:
-                print(NetworkMonitor.remove_known_device(args[1]))
-            else:
-                print("Usage: devices add <mac> <name> | devices remove <mac>")
-        else:
-            known = NetworkMonitor.get_known_devices()
-            print("KNOWN DEVICES")
-            print("-" * 40)
-            print("\nTrusted:")
-            for mac, info in known.get('trusted', {}).items():
-                print(f"  {mac}  {info.get('name', 'unnamed')}")
-            print("\nBlocked:")
-            for mac, info in known.get('blocked', {}).items():
-                print(f"  {mac}  {info.get('name', 'unnamed')}")
-
-    elif cmd == 'alerts':
-        unknown = NetworkMonitor.check_new_devices()
-        if unknown:
-            print("UNKNOWN DEVICES DETECTED!")
-            print("-" * 40)
-            for d in unknown:
-                print(f"  {d['ip']:15} {d['mac']}")
+HONEYPOT_COMMANDS = {
+    'status': (_honeypot_status, 0),
+    'start': (lambda a: print(Honeypot.start_service(a[0])), 1),
+    'stop': (lambda a: print(Honeypot.stop_service(a[0])), 1),
+    'logs': (_honeypot_logs, 0),
+    'clear': (lambda a: print(Honeypot.clear_logs()), 0),
+    'serve': (_honeypot_serve, 0),
+}
+
+# ---- WiFi ----
+
+def _wifi_audit(args: List[str]):
+    """wifi audit"""
+    result = WiFiSecurity.audit()
+    lines = ["WIFI SECURITY AUDIT", SEP40]
+    for key, val in result.get('info', {}).items():
+        lines.append(f"  {key}: {val}")
+    lines.append("\nIssues:")
+    for issue in result.get('issues', []):
+        lines.append(f"  ! {issue}")
+    if not result.get('issues'):
+        lines.append("  None found")
+    emit(lines)
+
+def _wifi_scan(args: List[str]):
+    """wifi scan"""
+    networks = WiFiSecurity.scan_networks()
+    lines = ["NEARBY WIFI NETWORKS", SEP40]
+    for net in networks:
+        lock = "🔒" if net.get('encrypted') else "🔓"
+        lines.append(f"  {lock} {net.get('ssid', 'hidden'):20} {net.get('quality', 'N/A')}")
+    emit(lines)
+
+def _wifi_clients(args: List[str]):
+    """wifi clients"""
+    clients = WiFiSecurity.list_clients()
+    lines = ["NETWORK CLIENTS", SEP50]
+    for c in clients:
+        lines.append(f"  {c.ip:15} {c.mac}")
+    emit(lines)
+
+WIFI_COMMANDS = {
+    'audit': (_wifi_audit, 0),
+    'scan': (_wifi_scan, 0),
+    'clients': (_wifi_clients, 0),
+}
+
+# ---- Breach Checker ----
+
+def _breach_email(args: List[str]):
+    """breach email <email>"""
+    result = BreachChecker.check_email(args[0])
+    lines = [f"BREACH CHECK: {args[0]}", SEP40]
+    if result.get('info'):
+        lines.append(f"  {result['info']}")
+    if result.get('note'):
+        lines.append(f"  {result['note']}")
+    emit(lines)
+
+def _breach_password(args: List[str]):
+    """breach password <pass>"""
+    result = BreachChecker.check_password(args[0])
+    lines = ["PASSWORD CHECK", SEP40]
+    if result.get('compromised'):
+        lines.append(f"  ⚠️  COMPROMISED! Found in {result['count']:,} breaches")
+        lines.append("  Recommendation: Change this password immediately!")
+    else:
+        lines.append("  ✓ Password not found in known breaches")
+    emit(lines)
+
+def _breach_password_file(args: List[str]):
+    """breach password-file <path>"""
+    try:
+        passwords = Path(args[0]).read_text().splitlines()
+    except OSError as e:
+        print(f"ERROR: {e}")
+        return
+    numbered = [(n, p) for n, p in enumerate(passwords, 1) if p]
+    results = BreachChecker.check_passwords([p for _, p in numbered])
+    lines = ["PASSWORD CHECK", SEP40]
+    # Report by line number so the passwords never reach the terminal
+    for (n, _), result in zip(numbered, results):
+        if result.get('error'):
+            lines.append(f"  #{n}: ERROR: {result['error']}")
+        elif result['compromised']:
+            lines.append(f"  #{n}: ⚠️  COMPROMISED! Found in {result['count']:,} breaches")
         else:
-            print("No unknown devices found")
+            lines.append(f"  #{n}: ✓ not found")
+    lines.append(f"\n{sum(r['compromised'] for r in results)} of {len(results)} compromised")
+    emit(lines)
+
+def _breach_check_all(args: List[str]):
+    """breach check-all"""
+    results = BreachChecker.check_monitored()
+    lines = ["BREACH CHECK: monitored emails", SEP40]
+    for result in results:
+        lines.append(f"  {result['email']}")
+        if result.get('error'):
+            lines.append(f"    ERROR: {result['error']}")
+        elif result.get('info'):
+            lines.append(f"    {result['info']}")
+    if not results:
+        lines.append("  None monitored")
+    emit(lines)
+
+def _breach_list(args: List[str]):
+    """breach list"""
+    emails = BreachChecker.list_monitored()
+    lines = ["MONITORED EMAILS", SEP30]
+    for email in emails:
+        lines.append(f"  {email}")
+    if not emails:
+        lines.append("  None")
+    emit(lines)
+
+BREACH_COMMANDS = {
+    'email': (_breach_email, 1),
+    'password': (_breach_password, 1),
+    'password-file': (_breach_password_file, 1),
+    'monitor': (lambda a: print(BreachChecker.add_monitor(a[0])), 1),
+    'unmonitor': (lambda a: print(BreachChecker.remove_monitor(a[0])), 1),
+    'list': (_breach_list, 0),
+    'check-all': (_breach_check_all, 0),
+}
+
+# ---- 2FA ----
+
+def _totp_get(args: List[str]):
+    """2fa get <name>"""
+    code = TOTPAuthenticator.get_code(args[0])
+    emit([f"2FA CODE: {args[0]}", SEP30, f"  {code}"])
+
+def _totp_list(args: List[str]):
+    """2fa list"""
+    services = TOTPAuthenticator.list_services()
+    lines = ["2FA SERVICES", SEP30]
+    for svc in services:
+        lines.append(f"  {svc}")
+    if not services:
+        lines.append("  None configured")
+    emit(lines)
+
+TOTP_COMMANDS = {
+    'add': (lambda a: print(TOTPAuthenticator.add_secret(a[0], ' '.join(a[1:]))), 2),
+    'get': (_totp_get, 1),
+    'remove': (lambda a: print(TOTPAuthenticator.remove_secret(a[0])), 1),
+    'list': (_totp_list, 0),
+}
+
+# ---- DNS/Pi-hole ----
+
+def _dns_status(args: List[str]):
+    """dns status"""
+    status = DNSControl.status()
+    lines = ["PI-HOLE STATUS", SEP40]
+    if status.get('error'):
+        lines.append(f"  {status['error']}")
+    else:
+        lines.append(f"  Status: {'Enabled' if status.get('status') == 'enabled' else 'Disabled'}")
+        lines.append(f"  Queries today: {status.get('dns_queries_today', 'N/A')}")
+        lines.append(f"  Blocked today: {status.get('ads_blocked_today', 'N/A')}")
+        lines.append(f"  Block rate: {status.get('ads_percentage_today', 'N/A')}%")
+    emit(lines)
+
+def _dns_file(action, path: str):
+    """dns block-file|unblock-file <path>: one domain per line, '#' comments"""
+    try:
+        text = Path(path).read_text()
+    except OSError as e:
+        print(f"ERROR: {e}")
+        return
+    domains = [line.split('#')[0].strip() for line in text.splitlines()]
+    print(action([d for d in domains if d]))
+
+DNS_COMMANDS = {
+    'status': (_dns_status, 0),
+    'enable': (lambda a: print(DNSControl.enable()), 0),
+    'disable': (lambda a: print(DNSControl.disable(int(a[0]) if a else 300)), 0),
+    'block': (lambda a: print(DNSControl.block_domain(a[0])), 1),
+    'unblock': (lambda a: print(DNSControl.unblock_domain(a[0])), 1),
+    'whitelist': (lambda a: print(DNSControl.whitelist_domain(a[0])), 1),
+    'block-file': (lambda a: _dns_file(DNSControl.block_domains, a[0]), 1),
+    'unblock-file': (lambda a: _dns_file(DNSControl.unblock_domains, a[0]), 1),
+}
+
+# ---- VPN ----
+
+def _vpn_status(args: List[str]):
+    """vpn status"""
+    status = VPNControl.status()
+    lines = ["WIREGUARD STATUS", SEP40]
+    if not status.get('installed'):
+        lines.append(f"  {status.get('error', 'Not installed')}")
+    else:
+        lines.append(f"  Active: {status.get('active')}")
+        for iface in status.get('interfaces', []):
+            lines.append(f"  Interface: {iface['name']}")
+            lines.append(f"    Peers: {len(iface.get('peers', []))}")
+    emit(lines)
+
+VPN_COMMANDS = {
+    'status': (_vpn_status, 0),
+    'up': (lambda a: print(VPNControl.up(a[0] if a else 'wg0')), 0),
+    'down': (lambda a: print(VPNControl.down(a[0] if a else 'wg0')), 0),
+    'newpeer': (lambda a: print(VPNControl.create_peer(a[0], a[1], a[2])), 3),
+}
+
+def dispatch(commands: Dict, usage: str, args: List[str]):
+    """Run the handler for args[0], or print usage if it is unknown or short of arguments"""
+    entry = commands.get(args[0]) if args else None
+    if entry is None or len(args) - 1 < entry[1]:
+        print(usage)
+        return
+    handler, _ = entry
+    handler(args[1:])
+
+def _group(commands: Dict, usage: str):
+    """Top-level handler that dispatches on a subcommand table"""
+    return lambda args: dispatch(commands, usage, args)
+
+COMMANDS = {
+    'scan': cmd_scan,
+    'devices': cmd_devices,
+    'alerts': cmd_alerts,
+    'honeypot': _group(HONEYPOT_COMMANDS, "Usage: honeypot status|start|stop|logs|clear"),
+    'wifi': _group(WIFI_COMMANDS, "Usage: wifi audit|scan|clients"),
+    'breach': _group(BREACH_COMMANDS, "Usage: breach email|password|password-file|monitor|unmonitor|list|check-all"),
+    '2fa': _group(TOTP_COMMANDS, "Usage: 2fa add|get|remove|list"),
+    'dns': _group(DNS_COMMANDS, "Usage: dns status|enable|disable|block|unblock|whitelist|block-file|unblock-file"),
+    'vpn': _group(VPN_COMMANDS, "Usage: vpn status|up|down|newpeer"),
+    'help': lambda args: print_help(),
+}
 
-    # Honeypot
-    elif cmd == 'honeypot':
-        if not args:
-            print("Usage: honeypot status|start|stop|logs|clear")
-            return
-        subcmd = args[0]
-        if subcmd == 'status':
-            status = Honeypot.status()
-            print("HONEYPOT STATUS")
-            print("-" * 30)
-            for svc, state in status.items():
-                icon = "●" if state == 'running' else "○"
-                print(f"  {icon} {svc}: {state}")
-        elif subcmd == 'start' and len(args) > 1:
-            print(Honeypot.start_service(args[1]))
-        elif subcmd == 'stop' and len(args) > 1:
-            print(Honeypot.stop_service(args[1]))
-        elif subcmd == 'logs':
-            limit = int(args[1]) if len(args) > 1 else 20
-            logs = Honeypot.get_logs(limit)
-            print(f"HONEYPOT LOGS (last {limit})")
-            print("-" * 50)
-            for log in logs:
-                print(f"  [{log['timestamp'][:19]}] {log['service']:6} from {log['source_ip']}")
-        elif subcmd == 'clear':
-            print(Honeypot.clear_logs())
-
-    # WiFi
-    elif cmd == 'wifi':
-        if not args:
-            print("Usage: wifi audit|scan|clients")
-            return
-        subcmd = args[0]
-        if subcmd == 'audit':
-            result = WiFiSecurity.audit()
-            print("WIFI SECURITY AUDIT")
-            print("-" * 40)
-            for key, val in result.get('info', {}).items():
-                print(f"  {key}: {val}")
-            print("\nIssues:")
-            for issue in result.get('issues', []):
-                print(f"  ! {issue}")
-            if not result.get('issues'):
-                print("  None found")
-        elif subcmd == 'scan':
-            networks = WiFiSecurity.scan_networks()
-            print("NEARBY WIFI NETWORKS")
-            print("-" * 40)
-            for net in networks:
-                lock = "🔒" if net.get('encrypted') else "🔓"
-                print(f"  {lock} {net.get('ssid', 'hidden'):20} {net.get('quality', 'N/A')}")
-        elif subcmd == 'clients':
-            clients = WiFiSecurity.list_clients()
-            print("NETWORK CLIENTS")
-            print("-" * 50)
-            for c in clients:
-                print(f"  {c['ip']:15} {c['mac']}")
-
-    # Breach Checker
-    elif cmd == 'breach':
-        if not args:
-            print("Usage: breach email|password|monitor|unmonitor|list")
-            return
-        subcmd = args[0]
-        if subcmd == 'email' and len(args) > 1:
-            result = BreachChecker.check_email(args[1])
-            print(f"BREACH CHECK: {args[1]}")
-            print("-" * 40)
-            if result.get('info'):
-                print(f"  {result['info']}")
-            if result.get('note'):
-                print(f"  {result['note']}")
-        elif subcmd == 'password' and len(args) > 1:
-            result = BreachChecker.check_password(args[1])
-            print("PASSWORD CHECK")
-            print("-" * 40)
-            if result.get('compromised'):
-                print(f"  ⚠️  COMPROMISED! Found in {result['count']:,} breaches")
-                print("  Recommendation: Change this password immediately!")
-            else:
-                print("  ✓ Password not found in known breaches")
-        elif subcmd == 'monitor' and len(args) > 1:
-            print(BreachChecker.add_monitor(args[1]))
-        elif subcmd == 'unmonitor' and len(args) > 1:
-            print(BreachChecker.remove_monitor(args[1]))
-        elif subcmd == 'list':
-            emails = BreachChecker.list_monitored()
-            print("MONITORED EMAILS")
-            print("-" * 30)
-            for email in emails:
-                print(f"  {email}")
-            if not emails:
-                print("  None")
-
-    # 2FA
-    elif cmd == '2fa':
-        if not args:
-            print("Usage: 2fa add|get|remove|list")
-            return
-        subcmd = args[0]
-        if subcmd == 'add' and len(args) >= 3:
-            print(TOTPAuthenticator.add_secret(args[1], ' '.join(args[2:])))
-        elif subcmd == 'get' and len(args) > 1:
-            code = TOTPAuthenticator.get_code(args[1])
-            print(f"2FA CODE: {args[1]}")
-            print("-" * 30)
-            print(f"  {code}")
-        elif subcmd == 'remove' and len(args) > 1:
-            print(TOTPAuthenticator.remove_secret(args[1]))
-        elif subcmd == 'list':
-            services = TOTPAuthenticator.list_services()
-            print("2FA SERVICES")
-            print("-" * 30)
-            for svc in services:
-                print(f"  {svc}")
-            if not services:
-                print("  None configured")
-
-    # DNS/Pi-hole
-    elif cmd == 'dns':
-        if not args:
-            print("Usage: dns status|enable|disable|block|unblock|whitelist")
-            return
-        subcmd = args[0]
-        if subcmd == 'status':
-            status = DNSControl.status()
-            print("PI-HOLE STATUS")
-            print("-" * 40)
-            if status.get('error'):
-                print(f"  {status['error']}")
-            else:
-                print(f"  Status: {'Enabled' if status.get('status') == 'enabled' else 'Disabled'}")
-                print(f"  Queries today: {status.get('dns_queries_today', 'N/A')}")
-                print(f"  Blocked today: {status.get('ads_blocked_today', 'N/A')}")
-                print(f"  Block rate: {status.get('ads_percentage_today', 'N/A')}%")
-        elif subcmd == 'enable':
-            print(DNSControl.enable())
-        elif subcmd == 'disable':
-            duration = int(args[1]) if len(args) > 1 else 300
-            print(DNSControl.disable(duration))
-        elif subcmd == 'block' and len(args) > 1:
-            print(DNSControl.block_domain(args[1]))
-        elif subcmd == 'unblock' and len(args) > 1:
-            print(DNSControl.unblock_domain(args[1]))
-        elif subcmd == 'whitelist' and len(args) > 1:
-            print(DNSControl.whitelist_domain(args[1]))
-
-    # VPN
-    elif cmd == 'vpn':
-        if not args:
-            print("Usage: vpn status|up|down|newpeer")
-            return
-        subcmd = args[0]
-        if subcmd == 'status':
-            status = VPNControl.status()
-            print("WIREGUARD STATUS")
-            print("-" * 40)
-            if not status.get('installed'):
-                print(f"  {status.get('error', 'Not installed')}")
-            else:
-                print(f"  Active: {status.get('active')}")
-                for iface in status.get('interfaces', []):
-                    print(f"  Interface: {iface['name']}")
-                    print(f"    Peers: {len(iface.get('peers', []))}")
-        elif subcmd == 'up':
-            iface = args[1] if len(args) > 1 else 'wg0'
-            print(VPNControl.up(iface))
-        elif subcmd == 'down':
-            iface = args[1] if len(args) > 1 else 'wg0'
-            print(VPNControl.down(iface))
-        elif subcmd == 'newpeer' and len(args) >= 4:
-            print(VPNControl.create_peer(args[1], args[2], args[3]))
-
-    elif cmd == 'help':
+def main():
+    if len(sys.argv) < 2:
         print_help()
+        return
 
-    else:
+    cmd = sys.argv[1].lower()
+    handler = COMMANDS.get(cmd)
+    if handler is None:
         print(f"Unknown command: {cmd}")
         print("Run 'security_tools.py help' for usage")
+        return
+    handler(sys.argv[2:])
 
 if __name__ == '__main__':
     main()
@@ -15,30 +15,49 @@ Currently supports:
   - More device types coming with community help!
 """
 import asyncio
+import importlib.util
+import ipaddress
 import json
+import os
+import re
+import socket
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
 
 __version__ = "2.0.0"
 __author__ = "Pavelevich"
 
-# Try to import tapo library (for lights/plugs)
-try:
-    from tapo import ApiClient
-    TAPO_AVAILABLE = True
-except ImportError:
-    TAPO_AVAILABLE = False
+# tapo (lights/plugs) and python-kasa (H200 hub, Python 3.11+) are heavy,
+# so only check they are installed here; _load_tapo/_load_kasa import them
+TAPO_AVAILABLE = importlib.util.find_spec("tapo") is not None
+KASA_AVAILABLE = sys.version_info >= (3, 11) and importlib.util.find_spec("kasa") is not None
+ApiClient = None
+Discover = None
 
-# Try to import python-kasa (for H200 hub) - requires Python 3.11+
+# Optional faster JSON for the config file
 try:
-    from kasa import Discover
-    KASA_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    KASA_AVAILABLE = False
+    ORJSON_AVAILABLE = False
 
 CONFIG_FILE = Path.home() / ".tapo_config.json"
 
+# Shared tapo client and device handles keyed by (ip, type), so repeated
+# lookups in one run reuse the same authenticated session
+_API_CLIENT = None
+_DEVICE_CACHE = {}
+
+# Last sensor readings per hub IP, shared between CLI runs
+SENSOR_CACHE_FILE = Path.home() / ".tapo_sensor_cache.json"
+SENSOR_CACHE_TTL = 5.0  # seconds; --no-cache always reads live
+_USE_SENSOR_CACHE = True
+
+# Connected kasa hubs keyed by IP: (device, monotonic time of last update)
+_HUB_CACHE = {}
+HUB_MAX_AGE = 5.0  # seconds before a cached hub is refreshed
+
 # Default configuration template
 DEFAULT_CONFIG = {
     "email": "",
@@ -49,16 +68,64 @@ DEFAULT_CONFIG = {
 }
 
 
+def _load_tapo():
+    """Import tapo on first use; returns ApiClient or None"""
+    global ApiClient, TAPO_AVAILABLE
+    if ApiClient is None and TAPO_AVAILABLE:
+        try:
+            from tapo import ApiClient
+        except ImportError:
+            TAPO_AVAILABLE = False
+    return ApiClient
+
+
+def _load_kasa():
+    """Import python-kasa on first use; returns Discover or None"""
+    global Discover, KASA_AVAILABLE
+    if Discover is None and KASA_AVAILABLE:
+        try:
+            from kasa import Discover
+        except ImportError:
+            KASA_AVAILABLE = False
+    return Discover
+
+
+def _read_json(path):
+    """Parse a JSON file, with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data, indent=True):
+    """Write data as JSON via a temp file and os.replace"""
+    if ORJSON_AVAILABLE:
+        raw = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    else:
+        raw = json.dumps(data, indent=2 if indent else None).encode()
+    # Keep the existing file's mode; new files are private (credentials)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    tmp = path.with_suffix(".json.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        os.fchmod(fd, mode)
+        f.write(raw)
+    os.replace(tmp, path)
+
+
 def load_config():
     """Load configuration from file or create default"""
     if CONFIG_FILE.exists():
-        with open(CONFIG_FILE) as f:
-            config = json.load(f)
-            if "hubs" not in config:
-                config["hubs"] = {}
-            if "cameras" not in config:
-                config["cameras"] = {}
-            return config
+        config = _read_json(CONFIG_FILE)
+        if "hubs" not in config:
+            config["hubs"] = {}
+        if "cameras" not in config:
+            config["cameras"] = {}
+        return config
     else:
         save_config(DEFAULT_CONFIG)
         print(f"Configuration file created at: {CONFIG_FILE}")
@@ -67,9 +134,14 @@ def load_config():
 
 
 def save_config(config):
-    """Save configuration to file"""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    """Save configuration to file atomically"""
+    _write_json(CONFIG_FILE, config)
+
+
+def emit(lines):
+    """Write collected output lines to stdout in one call"""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def check_credentials(config):
@@ -83,7 +155,7 @@ def check_credentials(config):
 
 async def get_device(config, device_name):
     """Connect to a light/plug by name using tapo library"""
-    if not TAPO_AVAILABLE:
+    if _load_tapo() is None:
         print("ERROR: 'tapo' library not installed")
         print("Run: pip install tapo")
         return None
@@ -93,11 +165,19 @@ async def get_device(config, device_name):
         print(f"Available devices: {list(config['devices'].keys())}")
         return None
 
+    global _API_CLIENT
+
     dev = config["devices"][device_name]
     ip = dev["ip"]
     dtype = dev["type"]
 
-    client = ApiClient(config["email"], config["password"])
+    key = (ip, dtype)
+    if key in _DEVICE_CACHE:
+        return _DEVICE_CACHE[key]
+
+    if _API_CLIENT is None:
+        _API_CLIENT = ApiClient(config["email"], config["password"])
+    client = _API_CLIENT
 
     try:
         device_methods = {
@@ -111,7 +191,14 @@ async def get_device(config, device_name):
         }
 
         method = device_methods.get(dtype, client.generic_device)
-        return await asyncio.wait_for(method(ip), timeout=10)
+        # asyncio.timeout (3.11+) avoids the extra Task wait_for creates
+        if hasattr(asyncio, "timeout"):
+            async with asyncio.timeout(10):
+                device = await method(ip)
+        else:
+            device = await asyncio.wait_for(method(ip), timeout=10)
+        _DEVICE_CACHE[key] = device
+        return device
     except asyncio.TimeoutError:
         print(f"ERROR: Timeout connecting to {device_name} ({ip})")
         return None
@@ -120,9 +207,23 @@ async def get_device(config, device_name):
         return None
 
 
+async def close():
+    """Drop the shared tapo client and device handles, close hub connections"""
+    global _API_CLIENT
+    _DEVICE_CACHE.clear()
+    _API_CLIENT = None
+
+    hubs = [device for device, _ in _HUB_CACHE.values()]
+    _HUB_CACHE.clear()
+    if hubs:
+        # Close all hubs at once; a failed close is not worth reporting
+        await asyncio.gather(*(device.protocol.close() for device in hubs),
+                             return_exceptions=True)
+
+
 async def get_hub_kasa(config, hub_name):
     """Connect to H200 hub using python-kasa (requires Python 3.11+)"""
-    if not KASA_AVAILABLE:
+    if _load_kasa() is None:
         print("ERROR: 'python-kasa' library not installed or Python < 3.11")
         print("H200 hub requires Python 3.11+ and python-kasa>=0.8.0")
         print("Run: pip install python-kasa")
@@ -137,48 +238,176 @@ async def get_hub_kasa(config, hub_name):
     ip = hub_info["ip"]
 
     try:
+        cached = _HUB_CACHE.get(ip)
+        if cached:
+            device, updated = cached
+            if time.monotonic() - updated > HUB_MAX_AGE:
+                await device.update()
+                _HUB_CACHE[ip] = (device, time.monotonic())
+            return device
+
         device = await Discover.discover_single(
             ip,
             username=config["email"],
             password=config["password"]
         )
         await device.update()
+        _HUB_CACHE[ip] = (device, time.monotonic())
         return device
     except Exception as e:
         print(f"ERROR connecting to hub: {e}")
         return None
 
 
+def _plain(value):
+    """Reduce a kasa feature value to something JSON can store"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _snapshot_hub(hub):
+    """Copy each child's alias, model and feature values/units into plain dicts"""
+    children = []
+    for child in hub.children:
+        features = {}
+        for name, feature in child.features.items():
+            unit = feature.unit if hasattr(feature, 'unit') and feature.unit else ''
+            features[name] = [_plain(feature.value), unit]
+        children.append({
+            "alias": child.alias,
+            "model": child.sys_info.get('model') if hasattr(child, 'sys_info') else None,
+            "features": features,
+        })
+    return children
+
+
+def clear_sensor_cache():
+    """Forget cached sensor readings (after hubs or sensors change)"""
+    try:
+        SENSOR_CACHE_FILE.unlink()
+    except FileNotFoundError:
+        pass
+
+
+async def get_hub_sensors(config, hub_name):
+    """Return {"ts", "children"} for a hub, from the sensor cache if fresh"""
+    hub_info = config.get("hubs", {}).get(hub_name)
+    ip = hub_info["ip"] if hub_info else None
+
+    if _USE_SENSOR_CACHE:
+        try:
+            entry = _read_json(SENSOR_CACHE_FILE).get(ip)
+        except (OSError, ValueError):
+            entry = None
+        if entry and time.time() - entry["ts"] < SENSOR_CACHE_TTL:
+            return entry
+
+    hub = await get_hub_kasa(config, hub_name)
+    if not hub:
+        return None
+
+    entry = {"ts": time.time(), "children": _snapshot_hub(hub)}
+
+    # Reload so hubs saved by concurrent reads in this run are kept
+    try:
+        cache = _read_json(SENSOR_CACHE_FILE)
+    except (OSError, ValueError):
+        cache = {}
+    cache[ip] = entry
+    try:
+        _write_json(SENSOR_CACHE_FILE, cache, indent=False)
+    except OSError:
+        pass
+    return entry
+
+
+# ==================== SENSOR FORMATTING ====================
+
+# Short status fragments for `sensors`, keyed by kasa feature name
+SENSOR_STATUS_FORMATS = {
+    'temperature': lambda v: f"Temp: {v}C",
+    'humidity': lambda v: f"Humidity: {v}%",
+    'is_open': lambda v: "OPEN" if v else "Closed",
+    'water_leak': lambda v: "LEAK!" if "leak" in str(v).lower() else "Dry",
+    'battery_level': lambda v: f"Bat: {v}%",
+}
+
+# Detail lines for `sensor`, called with (value, unit); None prints nothing
+SENSOR_READ_FORMATS = {
+    'temperature': lambda v, u: f"  Temperature: {v} {u}",
+    'humidity': lambda v, u: f"  Humidity: {v} {u}",
+    'is_open': lambda v, u: f"  Door/Window: {'OPEN' if v else 'Closed'}",
+    'water_leak': lambda v, u: f"  Water Leak: {v}",
+    'battery_level': lambda v, u: f"  Battery: {v} {u}",
+    'battery_low': lambda v, u: "  LOW BATTERY WARNING!" if v else None,
+    'rssi': lambda v, u: f"  Signal: {v} {u}",
+}
+
+# Action features that have no reading worth showing
+SENSOR_READ_SKIP = frozenset(['device_id', 'reboot', 'unpair', 'check_latest_firmware'])
+
+# Readings shown for each sensor found by hub-discover
+DISCOVER_FEATURES = frozenset(['temperature', 'humidity', 'is_open', 'water_leak', 'battery_level'])
+
+# Model substring -> sensor type, checked in order
+SENSOR_TYPES = (
+    ('T100', 'motion'),
+    ('T110', 'contact'),
+    ('T300', 'water'),
+    ('T310', 'temperature'),
+    ('T315', 'temperature'),
+    ('D230', 'camera'),
+    ('C420', 'camera'),
+    ('KE100', 'thermostat'),
+    ('S200', 'switch'),
+)
+
+# Device info fields shown by `info`, in display order, with their labels
+INFO_ATTRS = ('nickname', 'model', 'type', 'device_on', 'brightness',
+              'color_temp', 'on_time', 'overheated', 'rssi')
+INFO_FIELDS = tuple((attr, attr.replace('_', ' ').title()) for attr in INFO_ATTRS)
+
+# Value formatting for `info`; other fields print as-is
+INFO_FORMATS = {
+    'device_on': lambda v: 'ON' if v else 'OFF',
+    'brightness': lambda v: f'{v}%',
+    'on_time': lambda v: f'{v // 3600}h {(v % 3600) // 60}m',
+}
+
+
 # ==================== DEVICE COMMANDS ====================
 
 async def cmd_list(config):
     """List all configured devices"""
-    print("CONFIGURED TAPO DEVICES:")
-    print("-" * 50)
+    out = ["CONFIGURED TAPO DEVICES:"]
+    out.append("-" * 50)
 
     if config["devices"]:
-        print("\nLIGHTS & PLUGS:")
+        out.append("\nLIGHTS & PLUGS:")
         for name, dev in config["devices"].items():
-            print(f"  {name}: {dev['ip']} ({dev['type']})")
+            out.append(f"  {name}: {dev['ip']} ({dev['type']})")
 
     if config.get("hubs"):
-        print("\nHUBS (with sensors):")
+        out.append("\nHUBS (with sensors):")
         for name, hub in config["hubs"].items():
             model = hub.get("model", "H200")
-            print(f"  {name}: {hub['ip']} ({model})")
+            out.append(f"  {name}: {hub['ip']} ({model})")
             if hub.get("sensors"):
                 for sensor_name, sensor in hub["sensors"].items():
-                    print(f"    - {sensor_name}: {sensor['type']} ({sensor.get('model', 'unknown')})")
+                    out.append(f"    - {sensor_name}: {sensor['type']} ({sensor.get('model', 'unknown')})")
 
     if config.get("cameras"):
-        print("\nCAMERAS:")
+        out.append("\nCAMERAS:")
         for name, cam in config["cameras"].items():
-            print(f"  {name}: {cam['ip']}")
+            out.append(f"  {name}: {cam['ip']}")
 
     if not config["devices"] and not config.get("hubs") and not config.get("cameras"):
-        print("\nNo devices configured.")
-        print("Use 'tapo add <name> <ip> <type>' to add a device.")
-        print("Use 'tapo scan' to discover devices on your network.")
+        out.append("\nNo devices configured.")
+        out.append("Use 'tapo add <name> <ip> <type>' to add a device.")
+        out.append("Use 'tapo scan' to discover devices on your network.")
+
+    emit(out)
 
 
 async def cmd_info(config, device_name):
@@ -195,23 +424,24 @@ async def cmd_info(config, device_name):
     print(f"DEVICE: {device_name}")
     print("-" * 40)
 
-    attrs = ['nickname', 'model', 'type', 'device_on', 'brightness',
-             'color_temp', 'on_time', 'overheated', 'rssi']
-
-    for attr in attrs:
-        if hasattr(info, attr):
-            val = getattr(info, attr)
-            if val is not None:
-                name = attr.replace('_', ' ').title()
-                if attr == 'device_on':
-                    val = 'ON' if val else 'OFF'
-                elif attr == 'brightness':
-                    val = f'{val}%'
-                elif attr == 'on_time':
-                    hours = val // 3600
-                    minutes = (val % 3600) // 60
-                    val = f'{hours}h {minutes}m'
-                print(f"  {name}: {val}")
+    for attr, name in INFO_FIELDS:
+        val = getattr(info, attr, None)
+        if val is not None:
+            fmt = INFO_FORMATS.get(attr)
+            print(f"  {name}: {fmt(val) if fmt else val}")
+
+
+async def _switch(config, device_name, turn_on):
+    """Turn a device on or off; returns False if it could not be reached"""
+    device = await get_device(config, device_name)
+    if not device:
+        return False
+    if turn_on:
+        await device.on()
+    else:
+        await device.off()
+    print(f"OK: {device_name} turned {'ON' if turn_on else 'OFF'}")
+    return True
 
 
 async def cmd_on(config, device_name):
@@ -219,10 +449,7 @@ async def cmd_on(config, device_name):
     if not check_credentials(config):
         return
 
-    device = await get_device(config, device_name)
-    if device:
-        await device.on()
-        print(f"OK: {device_name} turned ON")
+    await _switch(config, device_name, True)
 
 
 async def cmd_off(config, device_name):
@@ -230,10 +457,7 @@ async def cmd_off(config, device_name):
     if not check_credentials(config):
         return
 
-    device = await get_device(config, device_name)
-    if device:
-        await device.off()
-        print(f"OK: {device_name} turned OFF")
+    await _switch(config, device_name, False)
 
 
 async def cmd_toggle(config, device_name):
@@ -274,37 +498,111 @@ async def cmd_color_temp(config, device_name, temp):
         print(f"OK: {device_name} color temperature set to {temp}K")
 
 
+SCAN_PORTS = (80, 9999)  # Tapo HTTP/KLAP, legacy Kasa protocol
+SCAN_TIMEOUT = 0.5
+# Hostname hints for Tapo hardware: brand, bulbs, plugs, hubs, cameras, sensors
+TAPO_HOST_RE = re.compile(r"tapo|l5[123]0|l630|p1(?:00|10|15)|h[12]00|c200|c[23]10|t1[01]0|t3(?:00|10|15)",
+                          re.IGNORECASE)
+
+
+def _local_network():
+    """Return the /24 around this host's outbound address, or None"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        s.close()
+    return ipaddress.ip_network(f"{ip}/24", strict=False)
+
+
+async def _probe_host(ip):
+    """Return (ip, hostname) if the host accepts a connection on a scan port"""
+    for port in SCAN_PORTS:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), SCAN_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            continue
+        writer.close()
+        break
+    else:
+        return None
+
+    try:
+        host, _ = await asyncio.get_running_loop().getnameinfo((ip, 0), socket.NI_NAMEREQD)
+    except OSError:
+        host = ""
+    return ip, host
+
+
+async def _kasa_discover(config):
+    """Broadcast Kasa/Tapo discovery; returns {ip: device} or {}"""
+    if _load_kasa() is None:
+        return {}
+    kwargs = {}
+    if config.get("email") and config.get("password"):
+        kwargs = {"username": config["email"], "password": config["password"]}
+    try:
+        return await Discover.discover(timeout=3, **kwargs)
+    except Exception:
+        return {}
+
+
 async def cmd_scan(config):
     """Scan network for devices"""
-    import subprocess
+    network = _local_network()
+    if network is None:
+        print("ERROR: Could not determine local network")
+        return
 
-    print("SCANNING NETWORK...")
-    print("-" * 40)
+    # Header goes out before the sweep, results are written in one go
+    print(f"SCANNING NETWORK ({network})...")
+    print("-" * 40, flush=True)
 
-    result = subprocess.run(['arp', '-a'], capture_output=True, text=True)
+    hosts = [str(ip) for ip in network.hosts()]
+    probes, discovered = await asyncio.gather(
+        asyncio.gather(*(_probe_host(ip) for ip in hosts), return_exceptions=True),
+        _kasa_discover(config),
+    )
 
-    tapo_keywords = ['tapo', 'l510', 'l530', 'l520', 'l630', 'p100', 'p110', 'p115',
-                     'h100', 'h200', 'c200', 'c310', 'c210', 't100', 't110', 't300', 't310', 't315']
+    names = {}
+    for result in probes:
+        if isinstance(result, tuple):
+            names[result[0]] = result[1]
+    for ip in discovered:
+        names.setdefault(ip, "")
+
+    out = []
     found = []
+    for ip in sorted(names, key=ipaddress.ip_address):
+        host = names[ip]
+        label = f"{ip} ({host})" if host else ip
+        dev = discovered.get(ip)
+        if dev is not None:
+            model = getattr(dev, "model", None)
+            label += f" [{model}]" if model else ""
+            is_tapo = True
+        else:
+            is_tapo = bool(TAPO_HOST_RE.search(host))
 
-    for line in result.stdout.split('\n'):
-        if '192.168' in line or '10.' in line or '172.' in line:
-            lower = line.lower()
-            is_tapo = any(kw in lower for kw in tapo_keywords)
-            if is_tapo:
-                print(f"  [TAPO] {line}")
-                found.append(line)
-            else:
-                print(f"  {line}")
+        if is_tapo:
+            out.append(f"  [TAPO] {label}")
+            found.append(ip)
+        else:
+            out.append(f"  {label}")
 
-    print("-" * 40)
-    print(f"Potential TAPO devices found: {len(found)}")
+    out.append("-" * 40)
+    out.append(f"Potential TAPO devices found: {len(found)}")
 
     if found:
-        print("\nTo add a device, use:")
-        print("  tapo add <name> <ip> <type>")
-        print("\nDevice types: l510, l520, l530, l630, p100, p110, p115")
-        print("For H200 hub: tapo hub-add <name> <ip>")
+        out.append("\nTo add a device, use:")
+        out.append("  tapo add <name> <ip> <type>")
+        out.append("\nDevice types: l510, l520, l530, l630, p100, p110, p115")
+        out.append("For H200 hub: tapo hub-add <name> <ip>")
+
+    emit(out)
 
 
 async def cmd_add(config, name, ip, dtype):
@@ -330,27 +628,52 @@ async def cmd_remove(config, name):
     elif name in config.get("hubs", {}):
         del config["hubs"][name]
         save_config(config)
+        clear_sensor_cache()
         print(f"OK: Hub '{name}' removed")
     else:
         print(f"ERROR: Device/Hub '{name}' not found")
 
 
-async def cmd_all_on(config):
-    """Turn all devices on"""
+async def _switch_all(config, turn_on):
+    """Switch every device concurrently; returns 1 if any device failed"""
     if not check_credentials(config):
-        return
+        return 1
+
+    names = list(config["devices"])
+    if not names:
+        return 0
 
-    for name in config["devices"].keys():
-        await cmd_on(config, name)
+    results = await asyncio.gather(*(_switch(config, name, turn_on) for name in names),
+                                   return_exceptions=True)
+    failed = False
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"ERROR: {name}: {result}")
+            failed = True
+        elif not result:
+            failed = True
+    return 1 if failed else 0
+
+
+async def cmd_all_on(config):
+    """Turn all devices on"""
+    return await _switch_all(config, True)
 
 
 async def cmd_all_off(config):
     """Turn all devices off"""
-    if not check_credentials(config):
-        return
+    return await _switch_all(config, False)
+
 
-    for name in config["devices"].keys():
-        await cmd_off(config, name)
+async def _device_status(config, name):
+    """Return the status line for one device, or None if unreachable"""
+    device = await get_device(config, name)
+    if not device:
+        return None
+    info = await device.get_device_info()
+    status = "ON" if info.device_on else "OFF"
+    brightness = f" ({info.brightness}%)" if hasattr(info, 'brightness') and info.brightness else ""
+    return f"  {name}: {status}{brightness}"
 
 
 async def cmd_status(config):
@@ -361,18 +684,33 @@ async def cmd_status(config):
     print("STATUS OF ALL DEVICES:")
     print("-" * 50)
 
-    for name in config["devices"].keys():
-        device = await get_device(config, name)
-        if device:
-            info = await device.get_device_info()
-            status = "ON" if info.device_on else "OFF"
-            brightness = f" ({info.brightness}%)" if hasattr(info, 'brightness') and info.brightness else ""
-            print(f"  {name}: {status}{brightness}")
+    # Query devices concurrently, then print in config order. Sections are
+    # written before the next fan-out so connection errors land beneath them
+    out = []
+    names = list(config["devices"])
+    if names:
+        results = await asyncio.gather(*(_device_status(config, name) for name in names),
+                                       return_exceptions=True)
+        for line in results:
+            if isinstance(line, Exception):
+                out.append(f"ERROR: {line}")
+            elif line:
+                out.append(line)
+
+    hub_names = list(config.get("hubs", {}))
+    if hub_names:
+        out.append("\nSENSORS:")
+        emit(out)
+        out = []
+        results = await asyncio.gather(*(_hub_sensor_lines(config, hub_name) for hub_name in hub_names),
+                                       return_exceptions=True)
+        for lines in results:
+            if isinstance(lines, Exception):
+                out.append(f"    Error reading sensors: {lines}")
+            else:
+                out.extend(lines)
 
-    if config.get("hubs"):
-        print("\nSENSORS:")
-        for hub_name in config["hubs"].keys():
-            await cmd_sensors_status(config, hub_name)
+    emit(out)
 
 
 # ==================== HUB COMMANDS (H200 via python-kasa) ====================
@@ -384,6 +722,7 @@ async def cmd_hub_add(config, name, ip, model="H200"):
 
     config["hubs"][name] = {"ip": ip, "name": name, "model": model, "sensors": {}}
     save_config(config)
+    clear_sensor_cache()
     print(f"OK: Hub '{name}' added ({ip}, {model})")
 
     if check_credentials(config) and KASA_AVAILABLE:
@@ -413,8 +752,6 @@ async def cmd_hub_info(config, hub_name):
     print(f"  MAC: {hw_info.get('mac', 'N/A')}")
     print(f"  Connected sensors: {len(hub.children)}")
 
-    await hub.protocol.close()
-
 
 async def cmd_hub_discover(config, hub_name):
     """Discover sensors connected to a hub"""
@@ -425,9 +762,10 @@ async def cmd_hub_discover(config, hub_name):
     if not hub:
         return
 
+    out = []
     try:
-        print(f"\nSENSORS FOUND IN {hub_name}:")
-        print("-" * 50)
+        out.append(f"\nSENSORS FOUND IN {hub_name}:")
+        out.append("-" * 50)
 
         hub_config = config["hubs"][hub_name]
         if "sensors" not in hub_config:
@@ -438,32 +776,15 @@ async def cmd_hub_discover(config, hub_name):
             model = child.sys_info.get('model', 'unknown') if hasattr(child, 'sys_info') else 'unknown'
 
             # Determine sensor type from model
-            sensor_type = "unknown"
             model_upper = str(model).upper()
-            if 'T100' in model_upper:
-                sensor_type = "motion"
-            elif 'T110' in model_upper:
-                sensor_type = "contact"
-            elif 'T300' in model_upper:
-                sensor_type = "water"
-            elif 'T310' in model_upper or 'T315' in model_upper:
-                sensor_type = "temperature"
-            elif 'D230' in model_upper or 'C420' in model_upper:
-                sensor_type = "camera"
-            elif 'KE100' in model_upper:
-                sensor_type = "thermostat"
-            elif 'S200' in model_upper:
-                sensor_type = "switch"
+            sensor_type = next((t for kw, t in SENSOR_TYPES if kw in model_upper), "unknown")
 
             # Create safe name
             safe_name = alias.lower().replace(' ', '_').replace('-', '_')
 
             # Get device ID
-            device_id = ""
-            for feature_name, feature in child.features.items():
-                if feature_name == "device_id":
-                    device_id = str(feature.value)
-                    break
+            id_feature = child.features.get("device_id")
+            device_id = str(id_feature.value) if id_feature else ""
 
             hub_config["sensors"][safe_name] = {
                 "device_id": device_id,
@@ -472,128 +793,121 @@ async def cmd_hub_discover(config, hub_name):
                 "type": sensor_type
             }
 
-            print(f"  {safe_name}:")
-            print(f"    Model: {model}")
-            print(f"    Type: {sensor_type}")
+            out.append(f"  {safe_name}:")
+            out.append(f"    Model: {model}")
+            out.append(f"    Type: {sensor_type}")
 
             # Show current values
             for feature_name, feature in child.features.items():
-                if feature_name in ['temperature', 'humidity', 'is_open', 'water_leak', 'battery_level']:
+                if feature_name in DISCOVER_FEATURES:
                     unit = feature.unit if hasattr(feature, 'unit') and feature.unit else ''
-                    print(f"    {feature_name}: {feature.value} {unit}")
+                    out.append(f"    {feature_name}: {feature.value} {unit}")
 
-            print()
+            out.append("")
 
         save_config(config)
-        print(f"OK: {len(hub_config['sensors'])} sensors saved to configuration")
-
-        await hub.protocol.close()
+        clear_sensor_cache()
+        out.append(f"OK: {len(hub_config['sensors'])} sensors saved to configuration")
 
     except Exception as e:
-        print(f"ERROR discovering sensors: {e}")
+        out.append(f"ERROR discovering sensors: {e}")
 
+    emit(out)
 
-async def cmd_sensors_status(config, hub_name):
-    """Show status of all sensors in a hub"""
-    if not check_credentials(config):
-        return
-
-    hub = await get_hub_kasa(config, hub_name)
-    if not hub:
-        return
 
+async def _hub_sensor_lines(config, hub_name):
+    """Return the sensor status lines for one hub"""
+    lines = []
     try:
-        print(f"\n  [{hub_name}] - {len(hub.children)} sensors")
+        snapshot = await get_hub_sensors(config, hub_name)
+        if not snapshot:
+            return []
 
-        for child in hub.children:
-            alias = child.alias or "Unknown"
-            model = child.sys_info.get('model', '') if hasattr(child, 'sys_info') else ''
+        children = snapshot["children"]
+        lines.append(f"\n  [{hub_name}] - {len(children)} sensors")
+
+        for child in children:
+            alias = child["alias"] or "Unknown"
+            model = child["model"] or ''
 
             status_parts = []
 
-            for feature_name, feature in child.features.items():
-                if feature_name == 'temperature':
-                    status_parts.append(f"Temp: {feature.value}C")
-                elif feature_name == 'humidity':
-                    status_parts.append(f"Humidity: {feature.value}%")
-                elif feature_name == 'is_open':
-                    status_parts.append("OPEN" if feature.value else "Closed")
-                elif feature_name == 'water_leak':
-                    status_parts.append("LEAK!" if "leak" in str(feature.value).lower() else "Dry")
-                elif feature_name == 'battery_level':
-                    status_parts.append(f"Bat: {feature.value}%")
+            for feature_name, (value, _) in child["features"].items():
+                fmt = SENSOR_STATUS_FORMATS.get(feature_name)
+                if fmt:
+                    status_parts.append(fmt(value))
 
             status_str = ", ".join(status_parts) if status_parts else "OK"
-            print(f"    {alias} ({model}): {status_str}")
-
-        await hub.protocol.close()
+            lines.append(f"    {alias} ({model}): {status_str}")
 
     except Exception as e:
-        print(f"    Error reading sensors: {e}")
+        lines.append(f"    Error reading sensors: {e}")
 
+    return lines
 
-async def cmd_sensor_read(config, hub_name, sensor_name):
-    """Read a specific sensor"""
+
+async def cmd_sensors_status(config, hub_name):
+    """Show status of all sensors in a hub"""
     if not check_credentials(config):
         return
 
-    hub = await get_hub_kasa(config, hub_name)
-    if not hub:
+    emit(await _hub_sensor_lines(config, hub_name))
+
+
+async def cmd_sensor_read(config, hub_name, sensor_name):
+    """Read a specific sensor"""
+    if not check_credentials(config):
         return
 
+    out = []
     try:
+        snapshot = await get_hub_sensors(config, hub_name)
+        if not snapshot:
+            return
+
         # Find sensor by name
         target_alias = sensor_name.replace('_', ' ')
 
-        for child in hub.children:
-            alias = child.alias or ""
+        for child in snapshot["children"]:
+            alias = child["alias"] or ""
             safe_alias = alias.lower().replace(' ', '_').replace('-', '_')
 
             if safe_alias == sensor_name or alias.lower() == target_alias.lower():
-                model = child.sys_info.get('model', 'unknown') if hasattr(child, 'sys_info') else 'unknown'
+                model = child["model"] or 'unknown'
 
-                print(f"SENSOR: {alias}")
-                print("-" * 40)
-                print(f"  Model: {model}")
-                print(f"  Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                print()
+                from datetime import datetime
 
-                for feature_name, feature in child.features.items():
-                    unit = feature.unit if hasattr(feature, 'unit') and feature.unit else ''
-                    value = feature.value
-
-                    # Format specific features
-                    if feature_name == 'temperature':
-                        print(f"  Temperature: {value} {unit}")
-                    elif feature_name == 'humidity':
-                        print(f"  Humidity: {value} {unit}")
-                    elif feature_name == 'is_open':
-                        print(f"  Door/Window: {'OPEN' if value else 'Closed'}")
-                    elif feature_name == 'water_leak':
-                        print(f"  Water Leak: {value}")
-                    elif feature_name == 'battery_level':
-                        print(f"  Battery: {value} {unit}")
-                    elif feature_name == 'battery_low':
-                        if value:
-                            print(f"  LOW BATTERY WARNING!")
-                    elif feature_name == 'rssi':
-                        print(f"  Signal: {value} {unit}")
-                    elif feature_name not in ['device_id', 'reboot', 'unpair', 'check_latest_firmware']:
-                        print(f"  {feature_name}: {value} {unit}")
-
-                await hub.protocol.close()
-                return
+                # Time of the reading, which may come from the sensor cache
+                taken = datetime.fromtimestamp(snapshot["ts"])
 
-        print(f"ERROR: Sensor '{sensor_name}' not found in hub '{hub_name}'")
-        print("Available sensors:")
-        for child in hub.children:
-            safe_alias = (child.alias or "").lower().replace(' ', '_').replace('-', '_')
-            print(f"  - {safe_alias}")
+                out.append(f"SENSOR: {alias}")
+                out.append("-" * 40)
+                out.append(f"  Model: {model}")
+                out.append(f"  Timestamp: {taken.strftime('%Y-%m-%d %H:%M:%S')}")
+                out.append("")
+
+                for feature_name, (value, unit) in child["features"].items():
+                    if feature_name in SENSOR_READ_SKIP:
+                        continue
 
-        await hub.protocol.close()
+                    fmt = SENSOR_READ_FORMATS.get(feature_name)
+                    line = fmt(value, unit) if fmt else f"  {feature_name}: {value} {unit}"
+                    if line:
+                        out.append(line)
+
+                emit(out)
+                return
+
+        out.append(f"ERROR: Sensor '{sensor_name}' not found in hub '{hub_name}'")
+        out.append("Available sensors:")
+        for child in snapshot["children"]:
+            safe_alias = (child["alias"] or "").lower().replace(' ', '_').replace('-', '_')
+            out.append(f"  - {safe_alias}")
 
     except Exception as e:
-        print(f"ERROR reading sensor: {e}")
+        out.append(f"ERROR reading sensor: {e}")
+
+    emit(out)
 
 
 async def cmd_hub_list(config):
@@ -603,18 +917,46 @@ async def cmd_hub_list(config):
         print("Use: tapo hub-add <name> <ip>")
         return
 
-    print("HUBS AND SENSORS:")
-    print("-" * 50)
+    out = ["HUBS AND SENSORS:", "-" * 50]
 
     for name, hub in config["hubs"].items():
         model = hub.get("model", "H200")
-        print(f"\n  {name}: {hub['ip']} ({model})")
+        out.append(f"\n  {name}: {hub['ip']} ({model})")
 
         if hub.get("sensors"):
             for sensor_name, sensor in hub["sensors"].items():
-                print(f"    - {sensor_name}: {sensor.get('model', 'unknown')} ({sensor['type']})")
+                out.append(f"    - {sensor_name}: {sensor.get('model', 'unknown')} ({sensor['type']})")
         else:
-            print("    (no sensors discovered - run hub-discover)")
+            out.append("    (no sensors discovered - run hub-discover)")
+
+    emit(out)
+
+
+async def _temp_for_hub(config, hub_name):
+    """Return the temperature reading lines for one hub"""
+    snapshot = await get_hub_sensors(config, hub_name)
+    if not snapshot:
+        return []
+
+    lines = [f"TEMPERATURE READINGS ({hub_name}):", "-" * 40]
+
+    found_temp = False
+    for child in snapshot["children"]:
+        features = child["features"]
+        temp_f = features.get('temperature')
+        if temp_f is None:
+            continue
+        hum_f = features.get('humidity')
+        humidity = hum_f[0] if hum_f else None
+
+        hum_str = f", {humidity}% humidity" if humidity else ""
+        lines.append(f"  {child['alias']}: {temp_f[0]}C{hum_str}")
+        found_temp = True
+
+    if not found_temp:
+        lines.append("  No temperature sensors found")
+
+    return lines
 
 
 async def cmd_temperature(config, hub_name=None):
@@ -628,32 +970,17 @@ async def cmd_temperature(config, hub_name=None):
 
     hubs_to_check = [hub_name] if hub_name else list(config["hubs"].keys())
 
-    for hname in hubs_to_check:
-        hub = await get_hub_kasa(config, hname)
-        if not hub:
-            continue
-
-        print(f"TEMPERATURE READINGS ({hname}):")
-        print("-" * 40)
-
-        found_temp = False
-        for child in hub.children:
-            for feature_name, feature in child.features.items():
-                if feature_name == 'temperature':
-                    humidity = None
-                    for fn, fv in child.features.items():
-                        if fn == 'humidity':
-                            humidity = fv.value
-                            break
-
-                    hum_str = f", {humidity}% humidity" if humidity else ""
-                    print(f"  {child.alias}: {feature.value}C{hum_str}")
-                    found_temp = True
-
-        if not found_temp:
-            print("  No temperature sensors found")
+    # Read hubs concurrently, then print in order
+    results = await asyncio.gather(*(_temp_for_hub(config, h) for h in hubs_to_check),
+                                   return_exceptions=True)
+    out = []
+    for lines in results:
+        if isinstance(lines, Exception):
+            out.append(f"ERROR: {lines}")
+        else:
+            out.extend(lines)
 
-        await hub.protocol.close()
+    emit(out)
 
 
 # ==================== HELP ====================
@@ -667,6 +994,7 @@ def print_version():
     print("Library status:")
     print(f"  tapo library: {'Available' if TAPO_AVAILABLE else 'Not installed'}")
     print(f"  python-kasa:  {'Available' if KASA_AVAILABLE else 'Not installed (H200 hub requires Python 3.11+)'}")
+    print(f"  orjson:       {'Available' if ORJSON_AVAILABLE else 'Not installed (optional)'}")
 
 
 def print_help():
@@ -702,6 +1030,7 @@ OTHER:
   scan                    - Scan network
   version                 - Show version
   help                    - This help
+  --no-cache              - Read sensors live (skip the 5s reading cache)
 
 DEVICE TYPES:
   Light bulbs: l510, l520, l530, l630
@@ -732,14 +1061,46 @@ CONFIGURATION:
 
 # ==================== MAIN ====================
 
-async def main():
-    if not TAPO_AVAILABLE and not KASA_AVAILABLE:
-        print("ERROR: No TAPO libraries available")
-        print("Run: pip install tapo")
-        print("For H200 hub: pip install python-kasa (requires Python 3.11+)")
-        return 1
+# Commands answered without reading the config file
+NO_CONFIG_COMMANDS = frozenset({"help", "-h", "--help", "version", "-v", "--version"})
+
+# Commands that only read or edit the config (or probe the LAN), so they
+# need neither credentials nor the tapo/kasa libraries
+OFFLINE_COMMANDS = frozenset({"list", "hub-list", "scan", "add", "remove", "hub-add"})
+
+# name -> (handler, min args, max args); extra arguments are ignored
+COMMANDS = {
+    # Device commands
+    "list": (cmd_list, 0, 0),
+    "status": (cmd_status, 0, 0),
+    "scan": (cmd_scan, 0, 0),
+    "all-on": (cmd_all_on, 0, 0),
+    "all-off": (cmd_all_off, 0, 0),
+    "info": (cmd_info, 1, 1),
+    "on": (cmd_on, 1, 1),
+    "off": (cmd_off, 1, 1),
+    "toggle": (cmd_toggle, 1, 1),
+    "bright": (cmd_brightness, 2, 2),
+    "color": (cmd_color_temp, 2, 2),
+    "add": (cmd_add, 3, 3),
+    "remove": (cmd_remove, 1, 1),
+
+    # Hub commands
+    "hub-add": (cmd_hub_add, 2, 3),
+    "hub-info": (cmd_hub_info, 1, 1),
+    "hub-discover": (cmd_hub_discover, 1, 1),
+    "hub-list": (cmd_hub_list, 0, 0),
+    "sensors": (cmd_sensors_status, 1, 1),
+    "sensor": (cmd_sensor_read, 2, 2),
+    "temp": (cmd_temperature, 0, 1),
+}
 
-    config = load_config()
+
+async def main():
+    global _USE_SENSOR_CACHE
+    if "--no-cache" in sys.argv:
+        sys.argv.remove("--no-cache")
+        _USE_SENSOR_CACHE = False
 
     if len(sys.argv) < 2:
         print_help()
@@ -747,72 +1108,49 @@ async def main():
 
     cmd = sys.argv[1].lower()
 
-    try:
-        # Device commands
-        if cmd == "help" or cmd == "-h" or cmd == "--help":
-            print_help()
-        elif cmd == "version" or cmd == "-v" or cmd == "--version":
+    if cmd in NO_CONFIG_COMMANDS:
+        if cmd in ("version", "-v", "--version"):
             print_version()
-        elif cmd == "list":
-            await cmd_list(config)
-        elif cmd == "status":
-            await cmd_status(config)
-        elif cmd == "scan":
-            await cmd_scan(config)
-        elif cmd == "all-on":
-            await cmd_all_on(config)
-        elif cmd == "all-off":
-            await cmd_all_off(config)
-        elif cmd == "info" and len(sys.argv) >= 3:
-            await cmd_info(config, sys.argv[2])
-        elif cmd == "on" and len(sys.argv) >= 3:
-            await cmd_on(config, sys.argv[2])
-        elif cmd == "off" and len(sys.argv) >= 3:
-            await cmd_off(config, sys.argv[2])
-        elif cmd == "toggle" and len(sys.argv) >= 3:
-            await cmd_toggle(config, sys.argv[2])
-        elif cmd == "bright" and len(sys.argv) >= 4:
-            await cmd_brightness(config, sys.argv[2], sys.argv[3])
-        elif cmd == "color" and len(sys.argv) >= 4:
-            await cmd_color_temp(config, sys.argv[2], sys.argv[3])
-        elif cmd == "add" and len(sys.argv) >= 5:
-            await cmd_add(config, sys.argv[2], sys.argv[3], sys.argv[4])
-        elif cmd == "remove" and len(sys.argv) >= 3:
-            await cmd_remove(config, sys.argv[2])
-
-        # Hub commands
-        elif cmd == "hub-add" and len(sys.argv) >= 4:
-            model = sys.argv[4] if len(sys.argv) >= 5 else "H200"
-            await cmd_hub_add(config, sys.argv[2], sys.argv[3], model)
-        elif cmd == "hub-info" and len(sys.argv) >= 3:
-            await cmd_hub_info(config, sys.argv[2])
-        elif cmd == "hub-discover" and len(sys.argv) >= 3:
-            await cmd_hub_discover(config, sys.argv[2])
-        elif cmd == "hub-list":
-            await cmd_hub_list(config)
-        elif cmd == "sensors" and len(sys.argv) >= 3:
-            await cmd_sensors_status(config, sys.argv[2])
-        elif cmd == "sensor" and len(sys.argv) >= 4:
-            await cmd_sensor_read(config, sys.argv[2], sys.argv[3])
-        elif cmd == "temp":
-            hub_name = sys.argv[2] if len(sys.argv) >= 3 else None
-            await cmd_temperature(config, hub_name)
-
         else:
-            print(f"Unknown command: {cmd}")
-            print("Run 'tapo help' for usage information.")
-            return 1
+            print_help()
+        return 0
 
+    if cmd not in OFFLINE_COMMANDS and not TAPO_AVAILABLE and not KASA_AVAILABLE:
+        print("ERROR: No TAPO libraries available")
+        print("Run: pip install tapo")
+        print("For H200 hub: pip install python-kasa (requires Python 3.11+)")
+        return 1
+
+    config = load_config()
+
+    handler, min_args, max_args = COMMANDS.get(cmd, (None, 0, 0))
+    args = sys.argv[2:]
+    if handler is None or len(args) < min_args:
+        print(f"Unknown command: {cmd}")
+        print("Run 'tapo help' for usage information.")
+        return 1
+
+    try:
+        # Handlers may return an exit code (all-on/all-off report failures)
+        code = await handler(config, *args[:max_args])
     except KeyboardInterrupt:
         print("\nOperation cancelled.")
         return 130
     except Exception as e:
         print(f"ERROR: {e}")
         return 1
+    finally:
+        await close()
 
-    return 0
+    return code or 0
 
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    # Optional faster event loop (uvloop.run needs uvloop 0.18+)
+    try:
+        import uvloop
+        run = uvloop.run
+    except (ImportError, AttributeError):
+        run = asyncio.run
+    exit_code = run(main())
     sys.exit(exit_code)